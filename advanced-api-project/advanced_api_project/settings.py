@@ -43,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'advanced_api_project.metrics.MetricsMiddleware',
+    'advanced_api_project.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'advanced_api_project.timing.ServerTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'advanced_api_project.urls'
@@ -143,4 +146,42 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
-}
\ No newline at end of file
+}
+
+# Per-URL-name SQL query budgets enforced by QueryBudgetMiddleware
+QUERY_BUDGETS = {
+    'book-list': 4,
+    'book-detail': 3,
+    'book-search': 3,
+    'author-list': 3,
+    'author-detail': 3,
+    'typeahead': 2,
+    'author-stats': 2,
+}
+QUERY_BUDGET_DEFAULT = None
+# Raise QueryBudgetExceeded instead of warning; the test runner sets it to True
+QUERY_BUDGET_RAISE = False
+TEST_RUNNER = 'advanced_api_project.test_runner.QueryBudgetTestRunner'
+
+# Server-Timing header and per-request timing log lines (advanced_api_project.timing)
+SERVER_TIMING = {
+    'ENABLED': True,
+    'HEADER': True,
+    'LOG': True,
+}
+
+# Prometheus-style metrics served at /metrics/ (advanced_api_project.metrics).
+# Point DIRECTORY (or $PROMETHEUS_MULTIPROC_DIR) at a directory shared by all
+# workers so every scrape reports the totals of the whole server.
+METRICS = {
+    'ENABLED': True,
+    'DIRECTORY': None,
+    'WRITE_INTERVAL': 1.0,
+}
+
+# Versioned response cache for catalog list endpoints (api/cache.py).
+# Use a shared CACHES backend when running several worker processes.
+API_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+}
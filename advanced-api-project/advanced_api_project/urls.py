@@ -20,10 +20,15 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.documentation import include_docs_urls
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
     
     # Django REST Framework browsable API authentication
     path('api-auth/', include('rest_framework.urls')),
+    
+    # Prometheus-style metrics for scraping
+    path('metrics/', metrics_view, name='metrics'),
 ]
\ No newline at end of file
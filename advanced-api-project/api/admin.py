@@ -11,6 +11,14 @@ class AuthorAdmin(admin.ModelAdmin):
     list_display = ('name', 'book_count')
     search_fields = ('name',)
     ordering = ('name',)
+    
+    def get_queryset(self, request):
+        """Annotate book counts so the changelist does not COUNT per row."""
+        return super().get_queryset(request).with_book_counts()
+    
+    @admin.display(description='Book count', ordering='num_books')
+    def book_count(self, obj):
+        return obj.book_count
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
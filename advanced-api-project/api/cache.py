@@ -0,0 +1,187 @@
+# api/cache.py
+
+"""
+Versioned response caching for the book catalog.
+
+Every model that appears in a cached response has a version counter in the
+Django cache. Saving or deleting a Book or Author bumps its counter (see
+api/signals.py), and the counters are part of every cache key, so one
+increment invalidates all cached pages at once without having to find and
+delete them. Old entries simply stop being read and expire on their own.
+
+Cache keys are built from the normalized query string: only the parameters
+that change the response are used, sorted, with empty values dropped, so
+`?ordering=title&search=` and `?ordering=title` share an entry.
+
+The same key doubles as the response ETag, which lets a matching
+If-None-Match be answered with 304 before the database is touched.
+Detail views use ConditionalRetrieveMixin instead, which derives the ETag
+from the updated_at columns of the object and its related rows.
+
+Settings:
+
+    API_RESPONSE_CACHE = {
+        'ENABLED': True,
+        'TIMEOUT': 300,   # seconds a cached page is kept
+    }
+
+With several worker processes, CACHES must point at a shared backend
+(Redis, Memcached, database) so that all workers see the same versions.
+"""
+
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from advanced_api_project.metrics import record_cache_lookup
+
+DEFAULTS = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'API_RESPONSE_CACHE', {})}
+
+
+def version_key(model_name):
+    return f'api:version:{model_name}'
+
+
+def get_versions(*model_names):
+    """
+    Return the current version of each model, creating missing counters.
+
+    New counters start from the current time in milliseconds rather than 1,
+    so a counter that was evicted never comes back with a value that old
+    cache entries were stored under.
+    """
+    keys = [version_key(name) for name in model_names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, int(time.time() * 1000), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model_name):
+    """Invalidate every cached response that depends on `model_name`."""
+    key = version_key(model_name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def normalize_query(query_params, allowed):
+    """Sorted, URL-encoded form of the allowed, non-empty query parameters."""
+    pairs = []
+    for name in sorted(allowed):
+        for value in sorted(query_params.getlist(name)):
+            if value.strip():
+                pairs.append((name, value.strip()))
+    return urlencode(pairs)
+
+
+def response_cache_key(prefix, request, allowed, model_names):
+    """
+    Return (cache_key, etag) for a request.
+
+    The host is part of the key because paginated responses contain absolute
+    next/previous links.
+    """
+    versions = get_versions(*model_names)
+    raw = '|'.join([
+        prefix,
+        request.get_host(),
+        normalize_query(request.query_params, allowed),
+        ':'.join(str(version) for version in versions),
+    ])
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f'api:response:{prefix}:{digest}', f'"{digest}"'
+
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get('If-None-Match', '')
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+class CachedListMixin:
+    """
+    Cache the serialized list response of a ListAPIView.
+
+    Views set `cache_prefix`, `cache_query_params` (the parameters that change
+    the response) and `cache_models` (whose versions invalidate it). Only JSON
+    responses are cached; the browsable API renders per user.
+    """
+
+    cache_prefix = None
+    cache_query_params = ()
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        config = get_config()
+        if not config['ENABLED'] or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+
+        key, etag = response_cache_key(self.cache_prefix, request, self.cache_query_params, self.cache_models)
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        data = cache.get(key)
+        record_cache_lookup(self.cache_prefix, data is not None)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, config['TIMEOUT'])
+        return Response(data, headers={'ETag': etag})
+
+
+class ConditionalRetrieveMixin:
+    """
+    Conditional GET support for RetrieveAPIView.
+
+    Views implement `get_validators(lookup)`, which reads only the columns
+    the representation depends on and returns (etag_parts, last_modified),
+    or None when the object does not exist. Last-Modified may be None when
+    the timestamps alone cannot tell every change apart (e.g. deleted
+    children). When the request's If-None-Match / If-Modified-Since match,
+    a 304 is returned without loading or serializing the object.
+
+    Only the object-level permission check is skipped for a 304, so use
+    this on views whose safe methods need no object permissions.
+    """
+
+    def get_validators(self, lookup):
+        raise NotImplementedError
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        validators = self.get_validators({self.lookup_field: kwargs[lookup_url_kwarg]})
+        if validators is None:
+            raise Http404
+        etag_parts, last_modified = validators
+        digest = hashlib.md5('|'.join(map(str, etag_parts)).encode(), usedforsecurity=False).hexdigest()
+        etag = quote_etag(digest)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
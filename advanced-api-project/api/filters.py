@@ -2,6 +2,7 @@
 
 import django_filters
 from .models import Book, Author
+from .search import filter_contains, matching_ids
 
 class BookFilter(django_filters.FilterSet):
     """
@@ -22,7 +23,7 @@ class BookFilter(django_filters.FilterSet):
     
     title_contains = django_filters.CharFilter(
         field_name='title', 
-        lookup_expr='icontains',
+        method='filter_title_contains',
         help_text='Filter by title containing text (case-insensitive)'
     )
     
@@ -34,7 +35,7 @@ class BookFilter(django_filters.FilterSet):
     
     author_name = django_filters.CharFilter(
         field_name='author__name',
-        lookup_expr='icontains',
+        method='filter_author_name',
         help_text='Filter by author name (case-insensitive)'
     )
     
@@ -58,4 +59,13 @@ class BookFilter(django_filters.FilterSet):
     
     class Meta:
         model = Book
-        fields = ['title', 'author', 'publication_year']
\ No newline at end of file
+        fields = ['title', 'author', 'publication_year']
+    
+    # The substring filters go through the trigram indexes (see api/search.py)
+    # instead of an unindexed LIKE '%value%' over the joined tables
+    
+    def filter_title_contains(self, queryset, name, value):
+        return filter_contains(queryset, 'title', value)
+    
+    def filter_author_name(self, queryset, name, value):
+        return queryset.filter(author__in=matching_ids(Author, 'name', value))
\ No newline at end of file
@@ -0,0 +1,262 @@
+# api/importers.py
+
+"""
+Streaming bulk import of books.
+
+Used by BookImportView (POST /api/books/import/) and the `import_books`
+management command. Rows are read incrementally from CSV or NDJSON and
+processed in batches, so apart from the author name map memory use depends
+on the batch size and not on the size of the file:
+
+1. Every row in the batch is validated in one pass (title, author name and
+   publication_year bounds, same rules as BookSerializer).
+2. Author names are resolved through an in-memory name -> id map. Names the
+   map has not seen yet are looked up with one query per batch, and authors
+   that do not exist yet are created with one bulk_create.
+3. Rows that would violate Book's unique_together (title, author,
+   publication_year), either against existing books or earlier rows of the
+   same import, are reported as duplicates instead of aborting the load.
+   Books inserted concurrently by another writer are detected when the
+   insert fails and reported the same way, so books_created (and the
+   statistics) only count rows that were actually written.
+4. The remaining books are written with one bulk_create per batch, and
+   the batch is added to the materialized statistics (api/stats.py).
+
+Each row is a mapping with `title`, `publication_year` and `author_name`
+(or `author`, holding the author's name).
+"""
+
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+
+from . import stats
+from .cache import bump_version
+from .models import Author, Book
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Cap on the duplicate/error details kept in a report; totals are always exact
+MAX_REPORTED_ROWS = 1000
+
+FORMATS = ('csv', 'ndjson')
+
+
+@dataclass
+class ImportReport:
+    """Outcome of an import: counts plus details of rejected rows."""
+
+    rows: int = 0
+    books_created: int = 0
+    authors_created: int = 0
+    duplicate_count: int = 0
+    error_count: int = 0
+    duplicates: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    def add_duplicate(self, line, row):
+        self.duplicate_count += 1
+        if len(self.duplicates) < MAX_REPORTED_ROWS:
+            self.duplicates.append({'line': line, **row})
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ROWS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'books_created': self.books_created,
+            'authors_created': self.authors_created,
+            'duplicate_count': self.duplicate_count,
+            'error_count': self.error_count,
+            'duplicates': self.duplicates,
+            'errors': self.errors,
+        }
+
+
+def iter_lines(byte_lines, encoding='utf-8-sig'):
+    """
+    Decode an iterable of byte lines incrementally (multi-byte safe).
+
+    utf-8-sig drops the byte order mark that Excel's "CSV UTF-8" export
+    writes, which would otherwise end up in the first header name.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for line in byte_lines:
+        yield decoder.decode(line) if isinstance(line, bytes) else line
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def read_rows(lines, fmt):
+    """
+    Yield (line_number, row) pairs from text lines in CSV or NDJSON format.
+
+    Rows that cannot be parsed are yielded with an `error` string instead of
+    a mapping, so they are reported with the other validation errors.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'ndjson':
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield number, f'Invalid JSON: {exc}'
+                continue
+            if not isinstance(row, dict):
+                yield number, 'Each line must be a JSON object'
+                continue
+            yield number, row
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+class BookImporter:
+    """
+    Import books from (line_number, row) pairs in batches.
+
+    One importer keeps its author name -> id map for its whole run, so each
+    author name is looked up at most once per import.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        self.author_ids = {}
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        if self.report.books_created:
+            bump_version('book')
+        if self.report.authors_created:
+            bump_version('author')
+        return self.report
+
+    def validate(self, batch):
+        """
+        Validate a whole batch in one pass.
+
+        Returns a list of (line, title, author_name, publication_year) for
+        the valid rows; invalid rows are recorded on the report.
+        """
+        current_year = datetime.now().year
+        valid = []
+        for line, row in batch:
+            self.report.rows += 1
+            if isinstance(row, str):
+                self.report.add_error(line, row)
+                continue
+            title = str(row.get('title') or '').strip()
+            author_name = str(row.get('author_name') or row.get('author') or '').strip()
+            year = str(row.get('publication_year') or '').strip()
+            if not title or len(title) > 255:
+                self.report.add_error(line, 'title is required and must be at most 255 characters')
+            elif not author_name or len(author_name) > 255:
+                self.report.add_error(line, 'author_name is required and must be at most 255 characters')
+            elif not year.lstrip('-').isdigit():
+                self.report.add_error(line, 'publication_year must be an integer')
+            elif not 1000 <= int(year) <= current_year:
+                self.report.add_error(line, f'publication_year must be between 1000 and {current_year}')
+            else:
+                valid.append((line, title, author_name, int(year)))
+        return valid
+
+    def resolve_authors(self, names):
+        """Fill the name -> id map for `names`, creating missing authors."""
+        missing = {name for name in names if name not in self.author_ids}
+        if not missing:
+            return
+        # Author names are not unique; reuse the oldest author with the name
+        for author_id, name in (
+            Author.objects.filter(name__in=missing).order_by('-id').values_list('id', 'name')
+        ):
+            self.author_ids[name] = author_id
+        to_create = [Author(name=name) for name in sorted(missing - self.author_ids.keys())]
+        if to_create:
+            created = Author.objects.bulk_create(to_create, batch_size=self.batch_size)
+            if any(author.pk is None for author in created):
+                # Backends without RETURNING support do not set primary keys
+                created = Author.objects.filter(name__in=[author.name for author in created]).order_by('-id')
+            for author in created:
+                self.author_ids[author.name] = author.pk
+            self.report.authors_created += len(to_create)
+            stats.apply_author_changes(added=len(to_create))
+
+    @staticmethod
+    def existing_keys(keys):
+        """The (title, author_id, publication_year) keys among `keys` already stored."""
+        return set(
+            Book.objects.filter(
+                author_id__in={key[1] for key in keys},
+                title__in={key[0] for key in keys},
+            ).values_list('title', 'author_id', 'publication_year')
+        )
+
+    @transaction.atomic
+    def import_batch(self, batch):
+        valid = self.validate(batch)
+        if not valid:
+            return
+        self.resolve_authors({author_name for _, _, author_name, _ in valid})
+
+        rows = [
+            (line, (title, self.author_ids[author_name], year))
+            for line, title, author_name, year in valid
+        ]
+        # Earlier batches are already committed, so the existing keys cover
+        # them; `seen` catches duplicates within this batch
+        existing = self.existing_keys([key for _, key in rows])
+        seen = set()
+        while True:
+            fresh = []
+            for line, key in rows:
+                if key in existing or key in seen:
+                    self.report.add_duplicate(line, self.describe(key))
+                else:
+                    seen.add(key)
+                    fresh.append((line, key))
+            rows = fresh
+            if not rows:
+                return
+            books = [Book(title=key[0], author_id=key[1], publication_year=key[2]) for _, key in rows]
+            try:
+                with transaction.atomic():
+                    Book.objects.bulk_create(books, batch_size=self.batch_size)
+            except IntegrityError:
+                # Another writer inserted some of these books since the check;
+                # look the keys up again so only the rows that land are counted
+                existing = self.existing_keys([key for _, key in rows])
+                if not existing:
+                    raise
+                seen = set()
+                continue
+            break
+        self.report.books_created += len(books)
+        stats.apply_book_changes(added=[(book.author_id, book.publication_year) for book in books])
+
+    @staticmethod
+    def describe(key):
+        return {'title': key[0], 'author_id': key[1], 'publication_year': key[2]}
+
+
+def import_books(byte_lines, fmt, batch_size=DEFAULT_BATCH_SIZE):
+    """Import books from an iterable of (byte or text) lines. Returns an ImportReport."""
+    return BookImporter(batch_size).run(read_rows(iter_lines(byte_lines), fmt))
@@ -0,0 +1,63 @@
+# api/management/commands/import_books.py
+
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importers import DEFAULT_BATCH_SIZE, FORMATS, import_books
+
+
+class Command(BaseCommand):
+    """
+    Bulk import books from a CSV or NDJSON file.
+    
+    The file is read line by line and imported in batches (see
+    api/importers.py), so catalogs of any size can be loaded.
+    
+    USAGE:
+    python manage.py import_books books.csv
+    python manage.py import_books books.ndjson --batch-size 5000
+    cat books.csv | python manage.py import_books - --format csv
+    """
+    help = 'Bulk import books from a CSV or NDJSON file ("-" reads stdin).'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or "-" for standard input.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Input format. Defaults to the file extension (.csv, otherwise NDJSON).',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format']
+        if fmt is None:
+            if path == '-':
+                raise CommandError('--format is required when reading from standard input.')
+            fmt = 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'ndjson'
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        
+        if path == '-':
+            report = import_books(sys.stdin.buffer, fmt, batch_size=options['batch_size'])
+        else:
+            try:
+                handle = open(path, 'rb')
+            except OSError as exc:
+                raise CommandError(f'Cannot open {path}: {exc}')
+            with handle:
+                report = import_books(handle, fmt, batch_size=options['batch_size'])
+        
+        for duplicate in report.duplicates:
+            self.stdout.write(
+                f"line {duplicate['line']}: duplicate {duplicate['title']!r} "
+                f"({duplicate['publication_year']}, author {duplicate['author_id']})"
+            )
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.books_created} books and {report.authors_created} new authors '
+            f'from {report.rows} rows ({report.duplicate_count} duplicates, {report.error_count} errors).'
+        ))
@@ -0,0 +1,30 @@
+# api/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.search import SQLiteTrigramBackend
+
+
+class Command(BaseCommand):
+    """
+    Recreate the SQLite trigram search tables and their triggers.
+    
+    Run this if the index drifted or after a migration rebuilt api_book or
+    api_author (SQLite drops a table's triggers when Django remakes it).
+    PostgreSQL maintains its pg_trgm indexes itself.
+    
+    USAGE:
+    python manage.py rebuild_search_index
+    """
+    help = 'Rebuild the trigram indexes behind book/author substring search.'
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write('Nothing to rebuild: only the SQLite index is maintained by the application.')
+            return
+        try:
+            SQLiteTrigramBackend().rebuild()
+        except Exception as exc:
+            raise CommandError(f'Could not build the trigram index: {exc}')
+        self.stdout.write(self.style.SUCCESS('Rebuilt the book title and author name trigram indexes.'))
@@ -0,0 +1,30 @@
+# api/management/commands/reconcile_statistics.py
+
+from django.core.management.base import BaseCommand
+
+from api.stats import reconcile
+
+
+class Command(BaseCommand):
+    """
+    Recompute the materialized catalog and author statistics.
+    
+    The statistics are updated incrementally as books and authors change;
+    this repairs any drift from writes that bypass those updates (raw SQL,
+    queryset.update() outside the bulk endpoint, fixtures). Schedule it
+    periodically, e.g. nightly from cron.
+    
+    USAGE:
+    python manage.py reconcile_statistics
+    """
+    help = 'Recompute the materialized author and catalog statistics.'
+    
+    def handle(self, *args, **options):
+        corrected = reconcile()
+        if any(corrected.values()):
+            self.stdout.write(self.style.WARNING(
+                f"Statistics had drifted: corrected {corrected['counters']} catalog counters "
+                f"and {corrected['authors']} author rows."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Statistics were up to date.'))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:10
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# (source table, column, FTS5 table / PostgreSQL index)
+TRIGRAM_INDEXES = [
+    ('api_book', 'title', 'api_book_title_trgm'),
+    ('api_author', 'name', 'api_author_name_trgm'),
+]
+
+
+def sqlite_statements(source, column, table):
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        f"{column}, content='{source}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {table}(rowid, {column}) VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {column} ON {source} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {table}(rowid, {column}) VALUES (new.id, new.{column}); END",
+        f"INSERT INTO {table}({table}) VALUES ('rebuild')",
+    ]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for source, column, table in TRIGRAM_INDEXES:
+            try:
+                for statement in sqlite_statements(source, column, table):
+                    schema_editor.execute(statement)
+            except OperationalError:
+                # No FTS5 or trigram tokenizer (SQLite < 3.34): api.search uses icontains
+                return
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for source, column, index in TRIGRAM_INDEXES:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {index}_idx ON {source} USING gin (UPPER({column}::text) gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for source, column, table in TRIGRAM_INDEXES:
+        if vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_{suffix}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+        elif vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_author_updated_at_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
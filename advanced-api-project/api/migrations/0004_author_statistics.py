@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min
+
+
+def populate_statistics(apps, schema_editor):
+    Author = apps.get_model('api', 'Author')
+    AuthorStatistics = apps.get_model('api', 'AuthorStatistics')
+    Book = apps.get_model('api', 'Book')
+    CatalogCounter = apps.get_model('api', 'CatalogCounter')
+
+    decades = (
+        Book.objects.annotate(decade=F('publication_year') / 10 * 10)
+        .values('decade')
+        .annotate(count=Count('id'))
+        .order_by('decade')
+    )
+    counters = [
+        CatalogCounter(name='authors', value=Author.objects.count()),
+        CatalogCounter(name='books', value=Book.objects.count()),
+    ]
+    counters += [CatalogCounter(name=f"books:{row['decade']}", value=row['count']) for row in decades]
+    CatalogCounter.objects.bulk_create(counters)
+    rows = (
+        Book.objects.values('author_id')
+        .annotate(book_count=Count('id'), earliest=Min('publication_year'), latest=Max('publication_year'))
+        .order_by()
+    )
+    AuthorStatistics.objects.bulk_create([
+        AuthorStatistics(
+            author_id=row['author_id'],
+            book_count=row['book_count'],
+            earliest_publication_year=row['earliest'],
+            latest_publication_year=row['latest'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_search_trigram_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStatistics',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='api.author')),
+                ('book_count', models.PositiveIntegerField(default=0)),
+                ('earliest_publication_year', models.IntegerField(null=True)),
+                ('latest_publication_year', models.IntegerField(null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Author statistics',
+                'verbose_name_plural': 'Author statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='CatalogCounter',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('value', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Catalog counter',
+                'verbose_name_plural': 'Catalog counters',
+            },
+        ),
+        migrations.RunPython(populate_statistics, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,29 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from datetime import datetime
 
+class AuthorQuerySet(models.QuerySet):
+    """Custom queryset for Author with reusable annotations."""
+    
+    def with_book_counts(self):
+        """
+        Annotate each author with `num_books`, the number of their books.
+        
+        Author.book_count and the author serializers read this annotation,
+        so listing N authors runs one query instead of N COUNT queries.
+        """
+        return self.annotate(num_books=models.Count('books'))
+    
+    def with_publication_year_range(self):
+        """
+        Annotate each author with the earliest and latest publication year
+        of their books, computed by MIN/MAX in the database.
+        """
+        return self.annotate(
+            earliest_publication_year=models.Min('books__publication_year'),
+            latest_publication_year=models.Max('books__publication_year'),
+        )
+
+
 class Author(models.Model):
    
     name = models.CharField(
@@ -11,6 +34,13 @@ class Author(models.Model):
         help_text="Full name of the author"
     )
     
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the author was last changed (used for ETags)"
+    )
+    
+    objects = AuthorQuerySet.as_manager()
+    
     class Meta:
         ordering = ['name']
         verbose_name = 'Author'
@@ -22,8 +52,43 @@ class Author(models.Model):
     
     @property
     def book_count(self):
-        """Return the number of books written by this author."""
+        """
+        Return the number of books written by this author.
+        
+        Uses the `num_books` annotation from with_book_counts() or the
+        prefetched books when available, and only falls back to a COUNT
+        query for an author loaded without either.
+        """
+        if hasattr(self, 'num_books'):
+            return self.num_books
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if 'books' in prefetched:
+            return len(prefetched['books'])
         return self.books.count()
+    
+    @property
+    def publication_year_range(self):
+        """
+        Return {'earliest': year, 'latest': year} for this author's books,
+        or None if they have none.
+        
+        Like book_count, this prefers the annotations from
+        with_publication_year_range() or prefetched books, and falls back to
+        a MIN/MAX aggregate query.
+        """
+        if hasattr(self, 'earliest_publication_year'):
+            earliest, latest = self.earliest_publication_year, self.latest_publication_year
+        elif 'books' in getattr(self, '_prefetched_objects_cache', {}):
+            years = [book.publication_year for book in self.books.all()]
+            earliest, latest = (min(years), max(years)) if years else (None, None)
+        else:
+            aggregate = self.books.aggregate(
+                earliest=models.Min('publication_year'), latest=models.Max('publication_year')
+            )
+            earliest, latest = aggregate['earliest'], aggregate['latest']
+        if earliest is None:
+            return None
+        return {'earliest': earliest, 'latest': latest}
 
 
 class Book(models.Model):
@@ -38,6 +103,7 @@ class Book(models.Model):
     - title: CharField to store the book's title
     - publication_year: IntegerField for the year the book was published
     - author: ForeignKey linking to the Author model
+    - updated_at: DateTimeField refreshed on every save, for conditional GETs
     
     The relationship works as follows:
     - Each Book instance has one Author (many-to-one from Book to Author)
@@ -64,6 +130,11 @@ class Book(models.Model):
         help_text="Author who wrote this book"
     )
     
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the book was last changed (used for ETags)"
+    )
+    
     class Meta:
         ordering = ['-publication_year', 'title']
         verbose_name = 'Book'
@@ -79,4 +150,54 @@ class Book(models.Model):
     def is_recent(self):
         """Check if the book was published in the last 5 years."""
         current_year = datetime.now().year
-        return current_year - self.publication_year <= 5
\ No newline at end of file
+        return current_year - self.publication_year <= 5
+
+
+class CatalogCounter(models.Model):
+    """
+    One materialized catalog-wide counter per row.
+    
+    Rows are named 'authors', 'books' and 'books:<decade>' (e.g.
+    'books:1990' for books published in the 1990s). Keeping each counter in
+    its own row lets writers apply `value = value + n` updates without
+    reading anything first, and writers touching different decades never
+    wait on the same row. Maintained by api/stats.py and recomputed by
+    `manage.py reconcile_statistics`.
+    """
+    name = models.CharField(max_length=32, primary_key=True)
+    value = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Catalog counter'
+        verbose_name_plural = 'Catalog counters'
+    
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class AuthorStatistics(models.Model):
+    """
+    Materialized per-author statistics, one row per author with books.
+    
+    Recomputed for the affected authors whenever their books change (see
+    api/stats.py); each recompute is one aggregate over the author's books,
+    which the Book.author foreign key index serves.
+    """
+    author = models.OneToOneField(
+        Author,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='statistics'
+    )
+    book_count = models.PositiveIntegerField(default=0)
+    earliest_publication_year = models.IntegerField(null=True)
+    latest_publication_year = models.IntegerField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Author statistics'
+        verbose_name_plural = 'Author statistics'
+    
+    def __str__(self):
+        return f"{self.author_id}: {self.book_count} books"
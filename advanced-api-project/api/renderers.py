@@ -0,0 +1,73 @@
+# api/renderers.py
+
+"""
+Renderers for the streaming catalog export.
+
+They let DRF's content negotiation pick the export format from ?format=csv /
+?format=ndjson or the Accept header. The export rows themselves never go
+through render(): BookExportView streams them with `stream()`, which turns
+an iterator of value tuples into encoded chunks. render() is only used for
+the small error responses (e.g. invalid filter values) of the same view.
+"""
+
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+# Rows encoded per chunk handed to the WSGI server
+ROWS_PER_CHUNK = 500
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON: one object per line."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (json.dumps(data) + '\n').encode(self.charset)
+
+    def stream(self, columns, rows):
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(dict(zip(columns, row))))
+            if len(lines) >= ROWS_PER_CHUNK:
+                yield ('\n'.join(lines) + '\n').encode(self.charset)
+                lines = []
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV with a header row."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        writer = csv.writer(_Echo())
+        items = data.items() if isinstance(data, dict) else [('detail', data)]
+        lines = [writer.writerow(['field', 'error'])]
+        lines += [writer.writerow([key, value]) for key, value in items]
+        return ''.join(lines).encode(self.charset)
+
+    def stream(self, columns, rows):
+        writer = csv.writer(_Echo())
+        lines = [writer.writerow(columns)]
+        for row in rows:
+            lines.append(writer.writerow(row))
+            if len(lines) >= ROWS_PER_CHUNK:
+                yield ''.join(lines).encode(self.charset)
+                lines = []
+        if lines:
+            yield ''.join(lines).encode(self.charset)
@@ -0,0 +1,178 @@
+# api/search.py
+
+"""
+Substring search over Book.title and Author.name backed by trigram indexes.
+
+`icontains` lookups (LIKE '%term%') cannot use a B-tree index, so every
+keystroke of the autocomplete UI used to scan the whole catalog. Trigram
+indexes turn a substring match into an index lookup instead:
+
+- SQLite: FTS5 tables using the trigram tokenizer (api_book_title_trgm and
+  api_author_name_trgm) as "external content" indexes over api_book.title
+  and api_author.name. Triggers created by the api migrations keep them in
+  step with every INSERT/UPDATE/DELETE, including bulk_create(), update()
+  and raw SQL, so nothing in Python has to maintain them.
+- PostgreSQL: GIN indexes with pg_trgm's gin_trgm_ops on UPPER(title) and
+  UPPER(name), which PostgreSQL uses for Django's icontains lookups as is.
+- Other databases, or SQLite without FTS5 trigram support: plain icontains.
+
+Trigram indexes need at least three characters; shorter terms fall back to
+icontains, which is cheap enough for the rare one- or two-letter query.
+
+`manage.py rebuild_search_index` recreates the SQLite tables and triggers,
+e.g. after a migration has rebuilt api_book or api_author.
+
+Set API_SEARCH_BACKEND to a dotted path to override the automatic choice.
+"""
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+from django.utils.module_loading import import_string
+
+from .models import Author, Book
+
+# (model, field) -> FTS5 table indexing it
+SQLITE_TRIGRAM_TABLES = {
+    (Book, 'title'): 'api_book_title_trgm',
+    (Author, 'name'): 'api_author_name_trgm',
+}
+
+MIN_TRIGRAM_LENGTH = 3
+
+# Matches ranked per typeahead call; common trigrams can match a large part
+# of the catalog, so only this many prefix and substring matches are sorted
+TYPEAHEAD_CANDIDATES = 200
+
+_backend = None
+
+
+class IcontainsSearchBackend:
+    """Unindexed LIKE '%term%' matching."""
+
+    def filter(self, queryset, field, term):
+        return queryset.filter(**{f'{field}__icontains': term})
+
+
+class PostgresTrigramBackend(IcontainsSearchBackend):
+    """
+    icontains compiles to UPPER(col) LIKE UPPER(%term%), which the pg_trgm
+    GIN expression indexes created by the api migrations serve directly.
+    """
+
+
+class SQLiteTrigramBackend:
+    """Substring matching through the FTS5 trigram tables."""
+
+    @staticmethod
+    def sql_statements():
+        """CREATE statements for the FTS tables and their sync triggers."""
+        statements = []
+        for (model, field), table in SQLITE_TRIGRAM_TABLES.items():
+            source = model._meta.db_table
+            statements += [
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                f"{field}, content='{source}', content_rowid='id', tokenize='trigram')",
+                f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} BEGIN "
+                f"INSERT INTO {table}(rowid, {field}) VALUES (new.id, new.{field}); END",
+                f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN "
+                f"INSERT INTO {table}({table}, rowid, {field}) VALUES ('delete', old.id, old.{field}); END",
+                f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {field} ON {source} BEGIN "
+                f"INSERT INTO {table}({table}, rowid, {field}) VALUES ('delete', old.id, old.{field}); "
+                f"INSERT INTO {table}(rowid, {field}) VALUES (new.id, new.{field}); END",
+            ]
+        return statements
+
+    @staticmethod
+    def drop_statements():
+        statements = []
+        for table in SQLITE_TRIGRAM_TABLES.values():
+            statements += [f'DROP TRIGGER IF EXISTS {table}_{suffix}' for suffix in ('ai', 'ad', 'au')]
+            statements.append(f'DROP TABLE IF EXISTS {table}')
+        return statements
+
+    def is_available(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (%s, %s)",
+                list(SQLITE_TRIGRAM_TABLES.values()),
+            )
+            return cursor.fetchone()[0] == len(SQLITE_TRIGRAM_TABLES)
+
+    def rebuild(self):
+        """Recreate the tables and triggers, and reindex every row."""
+        with connection.cursor() as cursor:
+            for statement in self.drop_statements() + self.sql_statements():
+                cursor.execute(statement)
+            for table in SQLITE_TRIGRAM_TABLES.values():
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+    def filter(self, queryset, field, term):
+        table = SQLITE_TRIGRAM_TABLES.get((queryset.model, field))
+        if table is None or len(term) < MIN_TRIGRAM_LENGTH:
+            return IcontainsSearchBackend().filter(queryset, field, term)
+        # A quoted phrase of trigrams matches the term as a case-insensitive substring
+        phrase = '"{}"'.format(term.replace('"', '""'))
+        matches = RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [phrase])
+        return queryset.filter(pk__in=matches)
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'API_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'postgresql':
+            _backend = PostgresTrigramBackend()
+        elif connection.vendor == 'sqlite' and SQLiteTrigramBackend().is_available():
+            _backend = SQLiteTrigramBackend()
+        else:
+            _backend = IcontainsSearchBackend()
+    return _backend
+
+
+def filter_contains(queryset, field, term):
+    """Filter `queryset` to rows whose `field` contains `term` (case-insensitive)."""
+    return get_search_backend().filter(queryset, field, term)
+
+
+def matching_ids(model, field, term):
+    """Subquery of the ids of `model` rows whose `field` contains `term`."""
+    return filter_contains(model.objects.all(), field, term).values('pk')
+
+
+def typeahead(model, field, term, limit=10):
+    """
+    Return the `limit` best matches for `term` in `model.field`.
+
+    Matches are ranked by quality: exact match, then prefix match, then a
+    word inside the value starting with the term, then any other substring.
+    Ties go to the shorter value, then alphabetical order.
+
+    Only the first TYPEAHEAD_CANDIDATES prefix matches and substring matches
+    are ranked, so the sort never covers the whole catalog. Callers should
+    require at least MIN_TRIGRAM_LENGTH characters, as shorter terms cannot
+    use the trigram index.
+    """
+    match_rank = Case(
+        When(**{f'{field}__iexact': term}, then=Value(0)),
+        When(**{f'{field}__istartswith': term}, then=Value(1)),
+        When(**{f'{field}__icontains': f' {term}'}, then=Value(2)),
+        default=Value(3),
+        output_field=IntegerField(),
+    )
+    matches = filter_contains(model.objects.all(), field, term).order_by()
+    prefix_matches = matches.filter(**{f'{field}__istartswith': term})
+    queryset = model.objects.filter(
+        Q(pk__in=prefix_matches.values('pk')[:TYPEAHEAD_CANDIDATES])
+        | Q(pk__in=matches.values('pk')[:TYPEAHEAD_CANDIDATES])
+    )
+    return queryset.annotate(match_rank=match_rank).order_by('match_rank', Length(field), field)[:limit]
+
+
+def book_search_condition(term):
+    """Q object matching books whose title or author's name contains `term`."""
+    return Q(pk__in=matching_ids(Book, 'title', term)) | Q(author__in=matching_ids(Author, 'name', term))
@@ -2,8 +2,30 @@
 
 from rest_framework import serializers
 from datetime import datetime
+from .filters import BookFilter
 from .models import Author, Book
 
+
+def get_query_list(request, name):
+    """
+    Parse a comma-separated query parameter such as ?expand=books or
+    ?fields=id,name into a set of names (empty if absent).
+    """
+    if request is None:
+        return set()
+    value = request.query_params.get(name, '')
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def expands_books(request):
+    """
+    Whether nested books should be included for this request.
+    
+    Without a request (serializer used directly in code) the nested books are
+    kept, matching the serializer's declared fields.
+    """
+    return request is None or 'books' in get_query_list(request, 'expand')
+
 class BookSerializer(serializers.ModelSerializer):
     """
     Custom serializer for the Book model with advanced validation.
@@ -85,6 +107,12 @@ class AuthorSerializer(serializers.ModelSerializer):
     all books related to an author. This allows API consumers to get complete
     author information including their books in a single request.
     
+    Response shaping (when a request is in the serializer context):
+    - Nested books are only serialized with ?expand=books
+    - ?fields=id,name limits the output to the listed fields
+    - publication_year_range comes from MIN/MAX annotations
+      (AuthorQuerySet.with_publication_year_range), not from the nested books
+    
     Relationship Handling:
     - Uses the 'books' related_name from the Book model's ForeignKey
     - Serializes books as a nested list within the author data
@@ -111,8 +139,28 @@ class AuthorSerializer(serializers.ModelSerializer):
             
         Returns:
             int: Number of books written by this author
+        
+        Note:
+            Author.book_count reads the `num_books` annotation or the
+            prefetched books when the view provided them (see
+            AuthorQuerySet.with_book_counts), so this does not issue a COUNT
+            query per author.
         """
-        return obj.books.count()
+        return obj.book_count
+    
+    def get_fields(self):
+        """
+        Drop the nested books unless requested with ?expand=books, and apply
+        the ?fields= selection.
+        """
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if not expands_books(request):
+            fields.pop('books', None)
+        requested = get_query_list(request, 'fields')
+        if requested:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        return fields
     
     def to_representation(self, instance):
         """
@@ -130,13 +178,13 @@ class AuthorSerializer(serializers.ModelSerializer):
         """
         representation = super().to_representation(instance)
         
-        # Example: Add metadata about the author's books
-        if representation['books']:
-            years = [book['publication_year'] for book in representation['books']]
-            representation['publication_year_range'] = {
-                'earliest': min(years),
-                'latest': max(years)
-            }
+        # Add metadata about the author's books, computed in SQL when the
+        # queryset was annotated (see Author.publication_year_range)
+        requested = get_query_list(self.context.get('request'), 'fields')
+        if not requested or 'publication_year_range' in requested:
+            year_range = instance.publication_year_range
+            if year_range is not None:
+                representation['publication_year_range'] = year_range
         
         return representation
 
@@ -156,7 +204,7 @@ class AuthorBasicSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'book_count']
     
     def get_book_count(self, obj):
-        return obj.books.count()
+        return obj.book_count
 
 
 # Serializer for creating books with author information
@@ -194,4 +242,120 @@ class BookCreateSerializer(serializers.ModelSerializer):
         """
         book = Book.objects.create(**validated_data)
         # Add any custom post-creation logic here
-        return book
\ No newline at end of file
+        return book
+
+
+# ========================
+# BULK OPERATIONS
+# ========================
+
+# Upper bound on the ids or patches accepted by one bulk request
+BULK_MAX_ITEMS = 10000
+
+
+class BookPatchSerializer(serializers.Serializer):
+    """
+    Field changes for one book (or for every book matched by a filter).
+    
+    The author is given as an id and checked for all patches of a request
+    at once by BookBulkUpdateSerializer, rather than with a query per patch
+    as a PrimaryKeyRelatedField would.
+    """
+    title = serializers.CharField(max_length=255, required=False)
+    publication_year = serializers.IntegerField(required=False)
+    author = serializers.IntegerField(required=False)
+    
+    def validate_publication_year(self, value):
+        """Same rules as BookSerializer."""
+        return BookSerializer().validate_publication_year(value)
+    
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError("At least one field to change is required.")
+        return data
+
+
+class BookIdPatchSerializer(BookPatchSerializer):
+    """A patch addressed to one book by id."""
+    id = serializers.IntegerField()
+    
+    def validate(self, data):
+        if len(data) < 2:
+            raise serializers.ValidationError("At least one field to change is required.")
+        return data
+
+
+class BookBulkSelectionMixin:
+    """
+    Validation shared by the bulk serializers for the `filter` selection.
+    
+    A filter uses the BookFilter vocabulary (title_contains, author_name,
+    year_from, year_to, ...). Unknown keys are rejected, and at least one
+    key is required so a typo cannot select the whole catalog.
+    """
+    
+    def validate_filter(self, value):
+        unknown = set(value) - set(BookFilter.base_filters)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown filter fields: {', '.join(sorted(unknown))}.")
+        if not value:
+            raise serializers.ValidationError("A filter needs at least one field.")
+        filterset = BookFilter(data=value, queryset=Book.objects.all())
+        if not filterset.is_valid():
+            raise serializers.ValidationError(filterset.errors)
+        # Keep the filtered queryset; it is evaluated as one UPDATE/DELETE
+        self.filtered_queryset = filterset.qs
+        return value
+
+
+class BookBulkUpdateSerializer(BookBulkSelectionMixin, serializers.Serializer):
+    """
+    Request body of the bulk update endpoint. Exactly one form is accepted:
+    
+    - {"updates": [{"id": 1, "publication_year": 1999}, {"id": 2, "author": 3}]}
+      applies individual patches with bulk_update.
+    - {"filter": {"author_name": "rowling"}, "set": {"author": 3}}
+      applies one patch to every matching book with a single UPDATE.
+    
+    All patches are validated in one pass: book and author ids are each
+    checked with one query for the whole request.
+    """
+    updates = BookIdPatchSerializer(many=True, required=False, max_length=BULK_MAX_ITEMS)
+    filter = serializers.DictField(required=False)
+    set = BookPatchSerializer(required=False)
+    
+    def validate(self, data):
+        if ('updates' in data) == ('filter' in data):
+            raise serializers.ValidationError("Send either 'updates' or 'filter' with 'set'.")
+        if 'filter' in data and 'set' not in data:
+            raise serializers.ValidationError({'set': "Required with 'filter'."})
+        patches = data.get('updates') or [data['set']]
+        
+        ids = [patch['id'] for patch in data.get('updates', [])]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError({'updates': "Each book id may only appear once."})
+        missing = set(ids) - set(Book.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError({'updates': f"Unknown book ids: {sorted(missing)}."})
+        
+        author_ids = {patch['author'] for patch in patches if 'author' in patch}
+        missing = author_ids - set(Author.objects.filter(pk__in=author_ids).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(f"Unknown author ids: {sorted(missing)}.")
+        return data
+
+
+class BookBulkDeleteSerializer(BookBulkSelectionMixin, serializers.Serializer):
+    """
+    Request body of the bulk delete endpoint: {"ids": [1, 2, 3]} or
+    {"filter": {"year_to": 1900}}.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=BULK_MAX_ITEMS
+    )
+    filter = serializers.DictField(required=False)
+    
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError("Send either 'ids' or 'filter'.")
+        return data
@@ -0,0 +1,100 @@
+# api/signals.py
+
+"""
+Signal handlers keeping derived data in step with Book and Author writes.
+
+Bumping a model's cache version invalidates every cached response that
+includes it (see api/cache.py). Book and Author changes are also applied to
+the materialized statistics (see api/stats.py).
+
+Bulk writes that go through save()/delete() anyway, such as
+queryset.delete(), run inside `book_handlers_muted()` and apply the cache
+and statistics updates once for the whole batch.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from . import stats
+from .cache import bump_version
+from .models import Author, Book
+
+_book_handlers_muted = ContextVar('book_handlers_muted', default=False)
+
+
+@contextmanager
+def book_handlers_muted():
+    """Skip the per-row Book handlers below; the caller updates in bulk."""
+    token = _book_handlers_muted.set(True)
+    try:
+        yield
+    finally:
+        _book_handlers_muted.reset(token)
+
+
+@receiver([post_save, post_delete], sender=Book)
+def invalidate_book_responses(sender, **kwargs):
+    if not _book_handlers_muted.get():
+        bump_version('book')
+
+
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_author_responses(sender, **kwargs):
+    bump_version('author')
+
+
+def _statistics_key(book):
+    """The (author, year) a book is counted under, or None if deferred."""
+    if 'author_id' in book.__dict__ and 'publication_year' in book.__dict__:
+        return (book.author_id, book.publication_year)
+    return None
+
+
+@receiver(post_init, sender=Book)
+def remember_book_statistics_key(sender, instance, **kwargs):
+    # Books loaded from the database remember what they were counted under,
+    # so saving them needs no extra query to find the previous values
+    instance._statistics_key = _statistics_key(instance)
+
+
+@receiver(pre_save, sender=Book)
+def load_book_statistics_key(sender, instance, raw=False, **kwargs):
+    # Only books with deferred fields, or unsaved instances given the pk of
+    # an existing row, have to look their previous values up
+    if raw or _book_handlers_muted.get() or instance.pk is None:
+        return
+    if instance._state.adding or getattr(instance, '_statistics_key', None) is None:
+        instance._statistics_key = (
+            Book.objects.filter(pk=instance.pk).values_list('author_id', 'publication_year').first()
+        )
+
+
+@receiver(post_save, sender=Book)
+def update_statistics_on_book_save(sender, instance, created, raw=False, **kwargs):
+    if raw or _book_handlers_muted.get():
+        return
+    old = None if created else getattr(instance, '_statistics_key', None)
+    new = (instance.author_id, instance.publication_year)
+    if old != new:
+        stats.apply_book_changes(added=[new], removed=[old] if old else [])
+    instance._statistics_key = new
+
+
+@receiver(post_delete, sender=Book)
+def update_statistics_on_book_delete(sender, instance, **kwargs):
+    if not _book_handlers_muted.get():
+        stats.apply_book_changes(removed=[(instance.author_id, instance.publication_year)])
+
+
+@receiver(post_save, sender=Author)
+def update_statistics_on_author_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.apply_author_changes(added=1)
+
+
+@receiver(post_delete, sender=Author)
+def update_statistics_on_author_delete(sender, instance, **kwargs):
+    stats.apply_author_changes(removed=1)
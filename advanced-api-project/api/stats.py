@@ -0,0 +1,181 @@
+# api/stats.py
+
+"""
+Incrementally maintained catalog statistics.
+
+CatalogCounter rows hold the author and book totals and the number of
+books per decade of publication; AuthorStatistics holds each author's book
+count and publication year range. Both are updated as the catalog changes,
+so reading them never aggregates over the catalog:
+
+- api/signals.py reports single Book/Author saves and deletes.
+- The bulk import, update and delete code report their changes in one call
+  per batch, since bulk_create(), bulk_update() and update() send no
+  signals, and the bulk delete mutes the per-book handlers.
+- `manage.py reconcile_statistics` recomputes everything from scratch and
+  repairs any drift, e.g. from raw SQL or writes that bypass these hooks.
+
+Counters are changed with `UPDATE ... SET value = value + n`, so writers
+never read a counter first or hold a lock on it beyond their own UPDATE.
+
+Changes are described as lists of (author_id, publication_year) pairs for
+books added and removed; an edited book is one removal plus one addition.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min
+from django.utils import timezone
+
+from .models import Author, AuthorStatistics, Book, CatalogCounter
+
+AUTHORS = 'authors'
+BOOKS = 'books'
+DECADE_PREFIX = 'books:'
+
+
+def decade_counter(year):
+    return f'{DECADE_PREFIX}{year // 10 * 10}'
+
+
+def increment(deltas):
+    """Add each delta to its counter, creating missing counters."""
+    now = timezone.now()
+    for name, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        counters = CatalogCounter.objects.filter(name=name)
+        if not counters.update(value=F('value') + delta, updated_at=now):
+            CatalogCounter.objects.bulk_create([CatalogCounter(name=name)], ignore_conflicts=True)
+            counters.update(value=F('value') + delta, updated_at=now)
+
+
+def author_statistics_rows(author_ids=None):
+    """Unsaved AuthorStatistics computed from the books, one aggregate query."""
+    books = Book.objects.all() if author_ids is None else Book.objects.filter(author_id__in=author_ids)
+    rows = (
+        books.values('author_id')
+        .annotate(
+            book_count=Count('id'),
+            earliest=Min('publication_year'),
+            latest=Max('publication_year'),
+        )
+        .order_by()
+    )
+    return [
+        AuthorStatistics(
+            author_id=row['author_id'],
+            book_count=row['book_count'],
+            earliest_publication_year=row['earliest'],
+            latest_publication_year=row['latest'],
+        )
+        for row in rows
+    ]
+
+
+def save_author_statistics(statistics):
+    AuthorStatistics.objects.bulk_create(
+        statistics,
+        update_conflicts=True,
+        unique_fields=['author'],
+        update_fields=['book_count', 'earliest_publication_year', 'latest_publication_year', 'updated_at'],
+        batch_size=1000,
+    )
+
+
+def refresh_author_statistics(author_ids):
+    """Recompute AuthorStatistics for `author_ids` with one aggregate query."""
+    author_ids = set(author_ids)
+    if not author_ids:
+        return
+    statistics = author_statistics_rows(author_ids)
+    save_author_statistics(statistics)
+    # Authors left without books
+    empty = author_ids - {row.author_id for row in statistics}
+    AuthorStatistics.objects.filter(author_id__in=empty).delete()
+
+
+@transaction.atomic(savepoint=False)
+def apply_book_changes(added=(), removed=()):
+    """Apply books added and removed, as (author_id, publication_year) pairs."""
+    added, removed = list(added), list(removed)
+    if not added and not removed:
+        return
+    deltas = Counter({BOOKS: len(added) - len(removed)})
+    deltas.update(decade_counter(year) for _, year in added)
+    deltas.subtract(decade_counter(year) for _, year in removed)
+    increment(deltas)
+    refresh_author_statistics(author_id for author_id, _ in added + removed)
+
+
+def apply_author_changes(added=0, removed=0):
+    """Apply a number of authors created and deleted."""
+    increment({AUTHORS: added - removed})
+
+
+def expected_counters():
+    counters = {AUTHORS: Author.objects.count(), BOOKS: Book.objects.count()}
+    decades = (
+        Book.objects.annotate(decade=F('publication_year') / 10 * 10)
+        .values('decade')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    counters.update((f"{DECADE_PREFIX}{row['decade']}", row['count']) for row in decades)
+    return counters
+
+
+@transaction.atomic
+def reconcile():
+    """
+    Recompute all statistics from the catalog and repair any that drifted.
+
+    Returns the number of corrected rows as {'counters': n, 'authors': n}.
+    """
+    expected = expected_counters()
+    stored = dict(CatalogCounter.objects.values_list('name', 'value'))
+    wrong_counters = {
+        name for name in expected.keys() | stored.keys()
+        if expected.get(name, 0) != stored.get(name, 0)
+    }
+    CatalogCounter.objects.filter(name__in=wrong_counters - expected.keys()).delete()
+    CatalogCounter.objects.bulk_create(
+        [CatalogCounter(name=name, value=expected[name]) for name in wrong_counters & expected.keys()],
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=['value', 'updated_at'],
+    )
+
+    expected_authors = author_statistics_rows()
+    stored_authors = {
+        row[0]: row[1:]
+        for row in AuthorStatistics.objects.values_list(
+            'author_id', 'book_count', 'earliest_publication_year', 'latest_publication_year'
+        )
+    }
+    wrong_authors = [
+        row for row in expected_authors
+        if stored_authors.get(row.author_id)
+        != (row.book_count, row.earliest_publication_year, row.latest_publication_year)
+    ]
+    save_author_statistics(wrong_authors)
+    stale = stored_authors.keys() - {row.author_id for row in expected_authors}
+    AuthorStatistics.objects.filter(author_id__in=stale).delete()
+    return {'counters': len(wrong_counters), 'authors': len(wrong_authors) + len(stale)}
+
+
+def get_catalog_statistics():
+    """Read the materialized totals and decade histogram (one query)."""
+    counters = CatalogCounter.objects.all()
+    values = {counter.name: counter.value for counter in counters}
+    return {
+        'total_authors': values.get(AUTHORS, 0),
+        'total_books': values.get(BOOKS, 0),
+        'books_per_decade': {
+            name.removeprefix(DECADE_PREFIX): value
+            for name, value in sorted(values.items())
+            if name.startswith(DECADE_PREFIX) and value > 0
+        },
+        'updated_at': max((counter.updated_at for counter in counters), default=None),
+    }
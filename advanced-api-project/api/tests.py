@@ -1,3 +1,579 @@
-from django.test import TestCase
+# api/tests.py
 
-# Create your tests here.
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from advanced_api_project.metrics import registry
+
+from . import stats
+from .importers import BookImporter
+from .models import Author, Book
+from .search import SQLiteTrigramBackend, get_search_backend
+
+
+class ServerTimingTests(APITestCase):
+    """Server-Timing header emitted for the book endpoints."""
+
+    def setUp(self):
+        author = Author.objects.create(name='J.K. Rowling')
+        Book.objects.create(title="Philosopher's Stone", publication_year=1997, author=author)
+
+    def timing_metrics(self, response):
+        return {metric.split(';')[0] for metric in response['Server-Timing'].split(', ')}
+
+    def test_class_based_view_reports_all_phases(self):
+        response = self.client.get(reverse('book-list'), {'publication_year': 1997})
+        self.assertEqual(
+            self.timing_metrics(response),
+            {'auth', 'perm', 'filter', 'paginate', 'serialize', 'view', 'render', 'db', 'total'},
+        )
+
+    def test_function_view_reports_serialization(self):
+        response = self.client.get(reverse('book-search'), {'q': 'stone'})
+        self.assertIn('serialize', self.timing_metrics(response))
+
+    @override_settings(SERVER_TIMING={'ENABLED': False})
+    def test_can_be_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('book-list')))
+
+
+class MetricsTests(APITestCase):
+    """Prometheus-style metrics exported at /metrics/."""
+
+    def setUp(self):
+        registry.reset()
+
+    def test_book_list_requests_are_counted(self):
+        self.client.get(reverse('book-list'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_requests_total{method="GET",route="book-list",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="book-list"} 1', body)
+
+    def test_other_addresses_are_refused(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.9').status_code, 403)
+
+
+class BookListCacheTests(APITestCase):
+    """Versioned response cache and ETags for BookListView."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Terry Pratchett')
+        Book.objects.create(title='Mort', publication_year=1987, author=self.author)
+        self.url = reverse('book-list')
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get(self.url, {'ordering': 'title', 'search': ''})
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {'ordering': 'title'})
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_book_and_author_writes_invalidate(self):
+        etag = self.client.get(self.url)['ETag']
+        Book.objects.create(title='Sourcery', publication_year=1988, author=self.author)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+
+        self.author.name = 'Sir Terry Pratchett'
+        self.author.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['results'][0]['author_name'], 'Sir Terry Pratchett')
+
+    def test_different_filters_are_cached_separately(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url, {'year_from': 2000})
+        self.assertEqual(response.json()['count'], 0)
+
+
+class ConditionalDetailTests(APITestCase):
+    """ETag / Last-Modified handling on the detail endpoints."""
+
+    def setUp(self):
+        self.author = Author.objects.create(name='Ursula K. Le Guin')
+        self.book = Book.objects.create(title='The Dispossessed', publication_year=1974, author=self.author)
+
+    def test_book_etag_returns_304_without_serializing(self):
+        url = reverse('book-detail', args=[self.book.pk])
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_book_etag_changes_with_author(self):
+        url = reverse('book-detail', args=[self.book.pk])
+        etag = self.client.get(url)['ETag']
+        self.author.name = 'Ursula Le Guin'
+        self.author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['author_name'], 'Ursula Le Guin')
+
+    def test_author_etag_changes_when_a_book_is_deleted(self):
+        url = reverse('author-detail', args=[self.author.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.book.delete()
+        response = self.client.get(url, {'expand': 'books'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['books'], [])
+
+    def test_missing_object_is_404(self):
+        self.assertEqual(self.client.get(reverse('book-detail', args=[999])).status_code, 404)
+
+
+class AuthorQueryCountTests(APITestCase):
+    """Book counts must not cost a query per author."""
+
+    def create_authors(self, count):
+        for i in range(count):
+            author = Author.objects.create(name=f'Author {Author.objects.count()}')
+            Book.objects.create(title=f'Book {author.pk}', publication_year=2000, author=author)
+            Book.objects.create(title=f'Sequel {author.pk}', publication_year=2001, author=author)
+
+    def test_author_list_query_count_is_constant(self):
+        self.create_authors(2)
+        # Pagination COUNT and the annotated authors, plus prefetched books
+        # when they are expanded
+        with self.assertNumQueries(2):
+            self.client.get(reverse('author-list'))
+        with self.assertNumQueries(3):
+            self.client.get(reverse('author-list'), {'expand': 'books'})
+        self.create_authors(6)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('author-list'))
+        with self.assertNumQueries(3):
+            self.client.get(reverse('author-list'), {'expand': 'books'})
+        self.assertEqual([author['book_count'] for author in response.json()['results']], [2] * 8)
+
+    def test_book_count_falls_back_without_annotation(self):
+        self.create_authors(1)
+        self.assertEqual(Author.objects.get().book_count, 2)
+        self.assertEqual(Author.objects.with_book_counts().get().book_count, 2)
+
+
+class AuthorResponseShapeTests(APITestCase):
+    """?expand=books, ?fields= and the SQL-computed publication_year_range."""
+
+    def setUp(self):
+        self.author = Author.objects.create(name='Octavia E. Butler')
+        Book.objects.create(title='Kindred', publication_year=1979, author=self.author)
+        Book.objects.create(title='Parable of the Sower', publication_year=1993, author=self.author)
+        Author.objects.create(name='No Books Yet')
+        self.url = reverse('author-detail', args=[self.author.pk])
+
+    def test_books_are_only_serialized_when_expanded(self):
+        self.assertNotIn('books', self.client.get(self.url).json())
+        books = self.client.get(self.url, {'expand': 'books'}).json()['books']
+        self.assertEqual([book['title'] for book in books], ['Parable of the Sower', 'Kindred'])
+
+    def test_publication_year_range_is_annotated(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['publication_year_range'], {'earliest': 1979, 'latest': 1993})
+        authors = self.client.get(reverse('author-list')).json()['results']
+        self.assertEqual([author['name'] for author in authors], ['No Books Yet', 'Octavia E. Butler'])
+        self.assertNotIn('publication_year_range', authors[0])
+
+    def test_fields_selects_output(self):
+        data = self.client.get(self.url, {'fields': 'id,name'}).json()
+        self.assertEqual(set(data), {'id', 'name'})
+        data = self.client.get(self.url, {'fields': 'name,publication_year_range'}).json()
+        self.assertEqual(set(data), {'name', 'publication_year_range'})
+
+    def test_range_falls_back_without_annotation(self):
+        self.assertEqual(self.author.publication_year_range, {'earliest': 1979, 'latest': 1993})
+
+
+class BookImportTests(APITestCase):
+    """Bulk import endpoint and the import_books command."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='pass')
+        self.client.force_authenticate(self.user)
+        self.existing_author = Author.objects.create(name='Frank Herbert')
+        Book.objects.create(title='Dune', publication_year=1965, author=self.existing_author)
+
+    def post_import(self, body, content_type, **params):
+        url = reverse('book-import')
+        if params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.generic('POST', url, body.encode(), content_type=content_type)
+
+    def test_csv_import_creates_books_and_missing_authors(self):
+        body = (
+            'title,author_name,publication_year\n'
+            'Dune Messiah,Frank Herbert,1969\n'
+            'Neuromancer,William Gibson,1984\n'
+            'Count Zero,William Gibson,1986\n'
+        )
+        response = self.post_import(body, 'text/csv', batch_size=2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['books_created'], 3)
+        self.assertEqual(response.data['authors_created'], 1)
+        self.assertEqual(Author.objects.filter(name='William Gibson').count(), 1)
+        self.assertEqual(self.existing_author.books.count(), 2)
+
+    def test_csv_with_byte_order_mark(self):
+        body = '\ufefftitle,author_name,publication_year\nDune Messiah,Frank Herbert,1969\n'
+        response = self.post_import(body, 'text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['books_created'], 1)
+        self.assertEqual(response.data['error_count'], 0)
+
+    def test_duplicates_and_invalid_rows_are_reported(self):
+        body = '\n'.join([
+            '{"title": "Dune", "author_name": "Frank Herbert", "publication_year": 1965}',
+            '{"title": "Children of Dune", "author_name": "Frank Herbert", "publication_year": 1976}',
+            '{"title": "Children of Dune", "author_name": "Frank Herbert", "publication_year": 1976}',
+            '{"title": "Future", "author_name": "Nobody", "publication_year": 3000}',
+            'not json',
+        ])
+        response = self.post_import(body, 'application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['books_created'], 1)
+        self.assertEqual([row['line'] for row in response.data['duplicates']], [1, 3])
+        self.assertEqual([row['line'] for row in response.data['errors']], [4, 5])
+        self.assertFalse(Author.objects.filter(name='Nobody').exists())
+
+    def test_concurrently_inserted_books_are_not_counted(self):
+        # Simulate another writer inserting Dune Messiah after the duplicate check
+        Book.objects.create(title='Dune Messiah', publication_year=1969, author=self.existing_author)
+        stats.reconcile()
+        key = ('Dune Messiah', self.existing_author.pk, 1969)
+        existing_keys = mock.Mock(side_effect=[set(), BookImporter.existing_keys([key])])
+        with mock.patch.object(BookImporter, 'existing_keys', existing_keys):
+            body = (
+                'title,author_name,publication_year\n'
+                'Dune Messiah,Frank Herbert,1969\n'
+                'Heretics of Dune,Frank Herbert,1984\n'
+            )
+            response = self.post_import(body, 'text/csv')
+        self.assertEqual(response.data['books_created'], 1)
+        self.assertEqual([row['line'] for row in response.data['duplicates']], [2])
+        self.assertEqual(self.client.get(reverse('author-stats')).json()['total_books'], 3)
+
+    def test_import_invalidates_cached_book_list(self):
+        cache.clear()
+        self.client.get(reverse('book-list'))
+        self.post_import('title,author,publication_year\nDune Messiah,Frank Herbert,1969\n', 'text/csv')
+        self.assertEqual(self.client.get(reverse('book-list')).json()['count'], 2)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.post_import('', 'text/csv').status_code, 403)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('title,author_name,publication_year\nDune Messiah,Frank Herbert,1969\nDune,Frank Herbert,1965\n')
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command('import_books', handle.name, stdout=out)
+        self.assertIn('Imported 1 books and 0 new authors from 2 rows (1 duplicates, 0 errors)', out.getvalue())
+
+    def test_unsupported_content_type_is_rejected(self):
+        response = self.post_import('title\nDune\n', 'application/xml')
+        self.assertEqual(response.status_code, 415)
+
+
+class BookExportTests(APITestCase):
+    """Streaming NDJSON/CSV export of the catalog."""
+
+    def setUp(self):
+        rowling = Author.objects.create(name='J.K. Rowling')
+        tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        self.stone = Book.objects.create(title="Philosopher's Stone", publication_year=1997, author=rowling)
+        Book.objects.create(title='The Hobbit', publication_year=1937, author=tolkien)
+
+    def export(self, **params):
+        response = self.client.get(reverse('book-export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_is_the_default(self):
+        response, body = self.export()
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(rows[0], {
+            'id': self.stone.pk, 'title': "Philosopher's Stone", 'publication_year': 1997,
+            'author': self.stone.author_id, 'author_name': 'J.K. Rowling',
+        })
+        self.assertEqual(len(rows), 2)
+
+    def test_csv_honours_book_filter(self):
+        response, body = self.export(format='csv', author_name='tolkien')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="books.csv"')
+        rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(rows[0], ['id', 'title', 'publication_year', 'author', 'author_name'])
+        self.assertEqual([row[1] for row in rows[1:]], ['The Hobbit'])
+
+    def test_invalid_filter_is_rejected(self):
+        response = self.client.get(reverse('book-export'), {'year_from': 'soon'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BookBulkWriteTests(APITestCase):
+    """Bulk update and delete endpoints."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='editor', password='pass')
+        self.client.force_authenticate(self.user)
+        self.rowling = Author.objects.create(name='J.K. Rowling')
+        self.galbraith = Author.objects.create(name='Robert Galbraith')
+        self.books = [
+            Book.objects.create(title=f'Book {i}', publication_year=2000 + i, author=self.rowling)
+            for i in range(3)
+        ]
+
+    def test_patches_are_applied_in_one_pass(self):
+        first, second, _ = self.books
+        before = first.updated_at
+        payload = {'updates': [
+            {'id': first.pk, 'publication_year': 1999},
+            {'id': second.pk, 'author': self.galbraith.pk, 'title': 'Renamed'},
+        ]}
+        # Validation (books, authors), transaction, one bulk UPDATE, then one
+        # UPDATE per changed decade counter (the 1990s counter is created
+        # first) and one upsert of the moved authors' statistics
+        with self.assertNumQueries(12):
+            response = self.client.patch(reverse('book-bulk-update'), payload, format='json')
+        self.assertEqual(response.json(), {'updated': 2})
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.publication_year, 1999)
+        self.assertGreater(first.updated_at, before)
+        self.assertEqual((second.title, second.author), ('Renamed', self.galbraith))
+
+    def test_filter_update_runs_single_update(self):
+        payload = {'filter': {'author_name': 'rowling', 'year_from': 2001}, 'set': {'author': self.galbraith.pk}}
+        response = self.client.patch(reverse('book-bulk-update'), payload, format='json')
+        self.assertEqual(response.json(), {'updated': 2})
+        self.assertEqual(self.galbraith.books.count(), 2)
+
+    def test_invalid_request_changes_nothing(self):
+        payload = {'updates': [
+            {'id': self.books[0].pk, 'publication_year': 1990},
+            {'id': self.books[1].pk, 'author': 999},
+        ]}
+        response = self.client.patch(reverse('book-bulk-update'), payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.books[0].refresh_from_db()
+        self.assertEqual(self.books[0].publication_year, 2000)
+
+        response = self.client.patch(
+            reverse('book-bulk-update'), {'filter': {'bogus': 1}, 'set': {'title': 'x'}}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_unique_together_violation_rolls_back(self):
+        payload = {'updates': [
+            {'id': self.books[0].pk, 'title': 'Same', 'publication_year': 2010},
+            {'id': self.books[1].pk, 'title': 'Same', 'publication_year': 2010},
+        ]}
+        response = self.client.patch(reverse('book-bulk-update'), payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Book.objects.filter(title='Same').exists())
+
+    def test_bulk_update_invalidates_cached_list(self):
+        cache.clear()
+        self.client.get(reverse('book-list'))
+        self.client.patch(reverse('book-bulk-update'), {
+            'filter': {'title': 'Book 0'}, 'set': {'title': 'Book Zero'},
+        }, format='json')
+        titles = [book['title'] for book in self.client.get(reverse('book-list')).json()['results']]
+        self.assertIn('Book Zero', titles)
+
+    def test_bulk_delete_by_ids_and_filter(self):
+        response = self.client.post(reverse('book-bulk-delete'), {'ids': [self.books[0].pk]}, format='json')
+        self.assertEqual(response.json(), {'deleted': 1})
+        response = self.client.post(reverse('book-bulk-delete'), {'filter': {'year_to': 2001}}, format='json')
+        self.assertEqual(response.json(), {'deleted': 1})
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_bulk_delete_query_count_is_constant(self):
+        Book.objects.bulk_create([
+            Book(title=f'Extra {i}', publication_year=1990 + i % 10, author=self.galbraith) for i in range(50)
+        ])
+        stats.reconcile()
+        # Transaction, the (author, year) read, the collector's SELECT and
+        # DELETE, then the book and decade counters and the author's statistics
+        with self.assertNumQueries(9):
+            response = self.client.post(
+                reverse('book-bulk-delete'), {'filter': {'year_from': 1990, 'year_to': 1999}}, format='json'
+            )
+        self.assertEqual(response.json(), {'deleted': 50})
+        self.assertFalse(Book.objects.filter(author=self.galbraith).exists())
+
+
+class TrigramSearchTests(APITestCase):
+    """Trigram-indexed substring search and the typeahead endpoint."""
+
+    def setUp(self):
+        self.rowling = Author.objects.create(name='J.K. Rowling')
+        self.potter = Author.objects.create(name='Potter Stewart')
+        for title, year in [
+            ('Harry Potter and the Chamber of Secrets', 1998),
+            ('Harry Potter', 1997),
+            ('The Tales of Beedle the Bard', 2008),
+            ('Fantastic Beasts and Where to Find Them', 2001),
+        ]:
+            Book.objects.create(title=title, publication_year=year, author=self.rowling)
+
+    def typeahead(self, q, **params):
+        response = self.client.get(reverse('typeahead'), {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_uses_trigram_index(self):
+        self.assertIsInstance(get_search_backend(), SQLiteTrigramBackend)
+
+    def test_results_are_ranked_by_match_quality(self):
+        data = self.typeahead('potter')
+        self.assertEqual(
+            [book['title'] for book in data['books']],
+            ['Harry Potter', 'Harry Potter and the Chamber of Secrets'],
+        )
+        self.assertEqual([author['name'] for author in data['authors']], ['Potter Stewart'])
+        titles = [book['title'] for book in self.typeahead('the')['books']]
+        self.assertEqual(titles[0], 'The Tales of Beedle the Bard')
+        self.assertEqual(len(self.typeahead('the', limit=1)['books']), 1)
+
+    def test_short_queries_return_nothing(self):
+        with self.assertNumQueries(0):
+            data = self.typeahead('ta')
+        self.assertEqual((data['books'], data['authors']), ([], []))
+
+    def test_only_capped_candidates_are_ranked(self):
+        with mock.patch('api.search.TYPEAHEAD_CANDIDATES', 1):
+            titles = [book['title'] for book in self.typeahead('harry')['books']]
+        # One prefix match and one substring match at most, prefix first
+        self.assertLessEqual(len(titles), 2)
+        self.assertTrue(titles[0].startswith('Harry'))
+
+    def test_index_follows_bulk_writes(self):
+        Book.objects.filter(title='Harry Potter').update(title='Philosopher Stone')
+        Book.objects.bulk_create([Book(title='Quidditch Through the Ages', publication_year=2001, author=self.rowling)])
+        Book.objects.filter(title__startswith='Fantastic').delete()
+        self.assertEqual(len(self.typeahead('potter')['books']), 1)
+        self.assertEqual(len(self.typeahead('quidditch')['books']), 1)
+        self.assertEqual(self.typeahead('beasts')['books'], [])
+
+    def test_book_filter_and_book_search_use_the_index(self):
+        response = self.client.get(reverse('book-list'), {'title_contains': 'chamber', 'author_name': 'rowl'})
+        self.assertEqual(response.json()['count'], 1)
+        response = self.client.get(reverse('book-search'), {'q': 'rowling'})
+        self.assertEqual(response.json()['results_count'], 4)
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Rebuilt', out.getvalue())
+        self.assertEqual(len(self.typeahead('potter')['books']), 2)
+
+
+class AuthorStatisticsTests(APITestCase):
+    """Materialized statistics behind /api/authors/stats/."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='librarian', password='pass')
+        self.rowling = Author.objects.create(name='J.K. Rowling')
+        self.tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        Author.objects.create(name='No Books Yet')
+        self.hobbit = Book.objects.create(title='The Hobbit', publication_year=1937, author=self.tolkien)
+        Book.objects.create(title='The Silmarillion', publication_year=1977, author=self.tolkien)
+        Book.objects.create(title='Harry Potter', publication_year=1997, author=self.rowling)
+
+    def stats(self, **params):
+        return self.client.get(reverse('author-stats'), params).json()
+
+    def test_stats_are_a_single_row_read(self):
+        with self.assertNumQueries(1):
+            data = self.stats()
+        # Authors are no longer counted once per book
+        self.assertEqual(data['total_authors'], 3)
+        self.assertEqual(data['total_books'], 3)
+        self.assertEqual(data['books_per_decade'], {'1930': 1, '1970': 1, '1990': 1})
+
+    def test_author_stats(self):
+        data = self.stats(author=self.tolkien.pk)
+        self.assertEqual(data['book_count'], 2)
+        self.assertEqual(
+            (data['earliest_publication_year'], data['latest_publication_year']), (1937, 1977)
+        )
+        self.assertEqual(self.stats(author=Author.objects.get(name='No Books Yet').pk)['book_count'], 0)
+        self.assertEqual(self.client.get(reverse('author-stats'), {'author': 999}).status_code, 404)
+
+    def test_saves_and_deletes_update_the_stats(self):
+        # The previous (author, year) is remembered from loading the book
+        book = Book.objects.get(pk=self.hobbit.pk)
+        book.title = 'There and Back Again'
+        with self.assertNumQueries(1):
+            book.save()
+        self.hobbit.author = self.rowling
+        self.hobbit.publication_year = 1998
+        self.hobbit.save()
+        data = self.stats()
+        self.assertEqual(data['books_per_decade'], {'1970': 1, '1990': 2})
+        self.assertEqual(self.stats(author=self.rowling.pk)['earliest_publication_year'], 1997)
+        self.assertEqual(self.stats(author=self.tolkien.pk)['book_count'], 1)
+
+        self.tolkien.delete()
+        data = self.stats()
+        self.assertEqual((data['total_authors'], data['total_books']), (2, 2))
+        self.assertEqual(data['books_per_decade'], {'1990': 2})
+
+    def test_bulk_writes_update_the_stats(self):
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            reverse('book-import'),
+            'title,author_name,publication_year\nBeren and Luthien,J.R.R. Tolkien,2017\nNew,New Author,2001\n',
+            content_type='text/csv',
+        )
+        self.client.patch(
+            reverse('book-bulk-update'),
+            {'filter': {'author_name': 'rowling'}, 'set': {'publication_year': 2005}},
+            format='json',
+        )
+        self.client.patch(
+            reverse('book-bulk-update'),
+            {'updates': [{'id': self.hobbit.pk, 'author': self.rowling.pk}]},
+            format='json',
+        )
+        data = self.stats()
+        self.assertEqual((data['total_authors'], data['total_books']), (4, 5))
+        self.assertEqual(data['books_per_decade'], {'1930': 1, '1970': 1, '2000': 2, '2010': 1})
+        self.assertEqual(self.stats(author=self.rowling.pk)['book_count'], 2)
+        out = StringIO()
+        call_command('reconcile_statistics', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+    def test_reconcile_repairs_drift(self):
+        Book.objects.filter(pk=self.hobbit.pk).update(publication_year=2020)
+        Author.objects.bulk_create([Author(name='Bulk')])
+        out = StringIO()
+        call_command('reconcile_statistics', stdout=out)
+        self.assertIn('corrected 3 catalog counters and 1 author rows', out.getvalue())
+        data = self.stats()
+        self.assertEqual(data['total_authors'], 4)
+        self.assertEqual(data['books_per_decade'], {'1970': 1, '1990': 1, '2020': 1})
+        self.assertEqual(self.stats(author=self.tolkien.pk)['latest_publication_year'], 2020)
@@ -10,6 +10,10 @@ urlpatterns = [
     path('books/create/', views.BookCreateView.as_view(), name='book-create'),
     path('books/update/<int:pk>/', views.BookUpdateView.as_view(), name='book-update'),
     path('books/delete/<int:pk>/', views.BookDeleteView.as_view(), name='book-delete'),
+    path('books/import/', views.BookImportView.as_view(), name='book-import'),
+    path('books/export/', views.BookExportView.as_view(), name='book-export'),
+    path('books/bulk/update/', views.BookBulkUpdateView.as_view(), name='book-bulk-update'),
+    path('books/bulk/delete/', views.BookBulkDeleteView.as_view(), name='book-bulk-delete'),
     
     # Author CRUD endpoints
     path('authors/', views.AuthorListView.as_view(), name='author-list'),
@@ -19,4 +23,5 @@ urlpatterns = [
     # Custom endpoints
     path('books/search/', views.book_search, name='book-search'),
     path('authors/stats/', views.author_statistics, name='author-stats'),
+    path('typeahead/', views.catalog_typeahead, name='typeahead'),
 ]
\ No newline at end of file
@@ -2,27 +2,42 @@
 
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from django_filters import rest_framework
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from .models import Author, Book
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from .models import Author, AuthorStatistics, Book
 from .serializers import (
     AuthorSerializer, 
     BookSerializer, 
     AuthorBasicSerializer,
-    BookCreateSerializer
+    BookCreateSerializer,
+    BookBulkUpdateSerializer,
+    BookBulkDeleteSerializer,
+    expands_books,
 )
+from .cache import CachedListMixin, ConditionalRetrieveMixin, bump_version
 from .filters import BookFilter
+from .importers import import_books
+from .renderers import CSVRenderer, NDJSONRenderer
+from .search import MIN_TRIGRAM_LENGTH, book_search_condition, typeahead
+from .signals import book_handlers_muted
+from . import stats
+from advanced_api_project.timing import ServerTimingMixin, timed
 
 # ========================
 # ENHANCED BOOK VIEWS WITH FILTERING, SEARCHING, AND ORDERING
 # ========================
 
-class BookListView(generics.ListAPIView):
+class BookListView(ServerTimingMixin, CachedListMixin, generics.ListAPIView):
     """
     Enhanced ListView for Books with filtering, searching, and ordering capabilities.
     
@@ -51,6 +66,11 @@ class BookListView(generics.ListAPIView):
     - GET /api/books/?search=potter - Search "potter" in title and author
     - GET /api/books/?ordering=-publication_year - Order by year (newest first)
     - GET /api/books/?search=fantasy&ordering=title - Search and order combined
+    
+    CACHING:
+    - JSON responses are cached per normalized query string (see api/cache.py)
+    - Any Book or Author write invalidates them through a version bump
+    - Responses carry an ETag; a matching If-None-Match returns 304
     """
     
     queryset = Book.objects.all().select_related('author')
@@ -82,20 +102,40 @@ class BookListView(generics.ListAPIView):
     
     # Set default ordering
     ordering = ['-publication_year', 'title']  # Default: newest books first, then by title
+    
+    # Configure response caching: parameters that change the response,
+    # and the models whose writes invalidate it
+    cache_prefix = 'book-list'
+    cache_query_params = [*BookFilter.base_filters, 'search', 'ordering', 'page']
+    cache_models = ['book', 'author']
 
 
-class BookDetailView(generics.RetrieveAPIView):
+class BookDetailView(ServerTimingMixin, ConditionalRetrieveMixin, generics.RetrieveAPIView):
     """
     DetailView for retrieving a single book by ID.
     
+    Supports conditional GETs: the ETag and Last-Modified headers come from
+    the book's and its author's updated_at, and a matching If-None-Match or
+    If-Modified-Since returns 304 without serializing the book.
+    
     URL: GET /api/books/<int:pk>/
     """
     queryset = Book.objects.all().select_related('author')
     serializer_class = BookSerializer
     permission_classes = [permissions.AllowAny]
+    
+    def get_validators(self, lookup):
+        """The representation includes author_name, so the author counts too."""
+        row = Book.objects.filter(**lookup).values('pk', 'updated_at', 'author__updated_at').first()
+        if row is None:
+            return None
+        return (
+            (row['pk'], row['updated_at'].isoformat(), row['author__updated_at'].isoformat()),
+            max(row['updated_at'], row['author__updated_at']),
+        )
 
 
-class BookCreateView(generics.CreateAPIView):
+class BookCreateView(ServerTimingMixin, generics.CreateAPIView):
     """
     CreateView for adding a new book.
     
@@ -106,7 +146,7 @@ class BookCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
 
 
-class BookUpdateView(generics.UpdateAPIView):
+class BookUpdateView(ServerTimingMixin, generics.UpdateAPIView):
     """
     UpdateView for modifying an existing book.
     
@@ -117,7 +157,7 @@ class BookUpdateView(generics.UpdateAPIView):
     permission_classes = [IsAuthenticated]
 
 
-class BookDeleteView(generics.DestroyAPIView):
+class BookDeleteView(ServerTimingMixin, generics.DestroyAPIView):
     """
     DeleteView for removing a book.
     
@@ -127,33 +167,298 @@ class BookDeleteView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated]
 
 
+IMPORT_MEDIA_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+}
+
+
+class BookBulkUpdateView(ServerTimingMixin, APIView):
+    """
+    Update many books in one request and one transaction.
+    
+    Either a list of per-book patches, applied with bulk_update:
+        {"updates": [{"id": 1, "publication_year": 1999}, {"id": 2, "author": 3}]}
+    or one patch for every book matching a BookFilter expression, applied
+    with a single UPDATE ... WHERE:
+        {"filter": {"author_name": "rowling", "year_to": 2000}, "set": {"author": 3}}
+    
+    The whole request is validated before anything is written (see
+    BookBulkUpdateSerializer). If a change would make two books identical
+    under unique_together, nothing is changed and 400 is returned.
+    
+    URL: PATCH /api/books/bulk/update/
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def patch(self, request):
+        serializer = BookBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        # bulk_update() and update() skip save(), so set auto_now by hand
+        now = timezone.now()
+        
+        try:
+            with transaction.atomic():
+                if 'updates' in data:
+                    updated = self.apply_patches(data['updates'], now)
+                else:
+                    updated = self.apply_filter_patch(serializer.filtered_queryset, data['set'], now)
+        except IntegrityError:
+            return Response(
+                {'detail': 'The changes would create duplicate books (same title, author and year).'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        # No save signals are sent for bulk writes, so invalidate explicitly;
+        # the statistics were updated inside the transaction
+        bump_version('book')
+        return Response({'updated': updated})
+    
+    @staticmethod
+    def model_field(name):
+        """Patches name the author by id."""
+        return 'author_id' if name == 'author' else name
+    
+    def apply_patches(self, patches, now):
+        # Lock the rows like apply_filter_patch, so concurrent bulk writes
+        # cannot overwrite each other or move the statistics off
+        books = Book.objects.select_for_update().in_bulk([patch['id'] for patch in patches])
+        before = {pk: (book.author_id, book.publication_year) for pk, book in books.items()}
+        fields = {'updated_at'}
+        for patch in patches:
+            book = books[patch['id']]
+            for name, value in patch.items():
+                if name != 'id':
+                    setattr(book, self.model_field(name), value)
+                    fields.add(self.model_field(name))
+            book.updated_at = now
+        Book.objects.bulk_update(books.values(), sorted(fields), batch_size=500)
+        
+        after = {pk: (book.author_id, book.publication_year) for pk, book in books.items()}
+        moved = [pk for pk in books if before[pk] != after[pk]]
+        stats.apply_book_changes(
+            added=[after[pk] for pk in moved],
+            removed=[before[pk] for pk in moved],
+        )
+        return len(books)
+    
+    def apply_filter_patch(self, queryset, patch, now):
+        changes = {self.model_field(name): value for name, value in patch.items()}
+        counted = {'author_id', 'publication_year'} & changes.keys()
+        if not counted:
+            return queryset.update(**changes, updated_at=now)
+        # Lock and read the (author, year) pairs being changed before the
+        # UPDATE rewrites them, to move the books in the statistics
+        removed = list(
+            queryset.select_for_update(of=('self',)).values_list('author_id', 'publication_year')
+        )
+        updated = queryset.update(**changes, updated_at=now)
+        added = [
+            (changes.get('author_id', author_id), changes.get('publication_year', year))
+            for author_id, year in removed
+        ]
+        stats.apply_book_changes(added=added, removed=removed)
+        return updated
+
+
+class BookBulkDeleteView(ServerTimingMixin, APIView):
+    """
+    Delete many books in one request and one transaction.
+    
+    Body: {"ids": [1, 2, 3]} or a BookFilter expression such as
+    {"filter": {"year_to": 1900}}. Unknown ids are ignored.
+    
+    URL: POST /api/books/bulk/delete/
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BookBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if 'ids' in serializer.validated_data:
+            queryset = Book.objects.filter(pk__in=serializer.validated_data['ids'])
+        else:
+            queryset = serializer.filtered_queryset
+        with transaction.atomic():
+            rows = list(queryset.select_for_update(of=('self',)).values_list('pk', 'author_id', 'publication_year'))
+            # One statistics update and cache bump for the batch instead of
+            # the per-book post_delete handlers
+            with book_handlers_muted():
+                deleted, _ = Book.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+            stats.apply_book_changes(removed=[(author_id, year) for _, author_id, year in rows])
+        if deleted:
+            bump_version('book')
+        return Response({'deleted': deleted})
+
+
+class BookImportView(ServerTimingMixin, APIView):
+    """
+    Bulk import endpoint for loading large catalogs.
+    
+    The request body is streamed as CSV (with a header row) or NDJSON and
+    imported in batches by api.importers: author names are resolved to ids
+    (missing authors are created), publication years are validated, and
+    books are inserted with bulk_create. Rows that duplicate an existing
+    book, or fail validation, are listed in the response instead of
+    aborting the import.
+    
+    The format comes from the Content-Type: text/csv, or
+    application/x-ndjson for NDJSON. (?format= is not used because DRF
+    reserves it for choosing the response renderer.)
+    Batch size: ?batch_size=1000.
+    
+    URL: POST /api/books/import/
+    
+    EXAMPLE:
+    curl -u user:pass -H 'Content-Type: text/csv' --data-binary @books.csv \
+        http://localhost:8000/api/books/import/
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        media_type = request.content_type.split(';')[0].strip()
+        fmt = IMPORT_MEDIA_TYPES.get(media_type)
+        if fmt is None:
+            return Response(
+                {'detail': f"Unsupported Content-Type {media_type!r}; use {' or '.join(IMPORT_MEDIA_TYPES)}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        try:
+            batch_size = int(request.query_params.get('batch_size', 1000))
+        except ValueError:
+            batch_size = 0
+        if not 1 <= batch_size <= 10000:
+            return Response(
+                {'detail': 'batch_size must be an integer between 1 and 10000.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        # Read the body line by line instead of through request.data,
+        # which would load and parse it all at once
+        stream = request.stream
+        lines = iter(stream.readline, b'') if stream is not None else []
+        report = import_books(lines, fmt, batch_size=batch_size)
+        
+        response_status = status.HTTP_201_CREATED if report.books_created else status.HTTP_200_OK
+        return Response(report.as_dict(), status=response_status)
+
+
+class BookExportView(ServerTimingMixin, APIView):
+    """
+    Streaming export of the whole book catalog.
+    
+    Unlike BookListView this is not paginated. Rows are read with
+    values_list() and QuerySet.iterator(), so no model instances or
+    serializers are involved, and streamed to the client as they are
+    encoded: memory use stays constant however large the catalog is.
+    
+    FORMATS (DRF content negotiation):
+    - NDJSON (default): ?format=ndjson or Accept: application/x-ndjson
+    - CSV: ?format=csv or Accept: text/csv
+    
+    FILTERING:
+    - Accepts the same parameters as BookListView's BookFilter, e.g.
+      ?author_name=rowling&year_from=1990
+    
+    Rows are ordered by id and have the columns id, title,
+    publication_year, author (id) and author_name.
+    
+    URL: GET /api/books/export/
+    """
+    permission_classes = [permissions.AllowAny]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    
+    # Columns in the export, and the values_list() lookups that fill them
+    export_columns = ['id', 'title', 'publication_year', 'author', 'author_name']
+    export_lookups = ['id', 'title', 'publication_year', 'author_id', 'author__name']
+    chunk_size = 2000
+    
+    def get(self, request):
+        filterset = BookFilter(request.query_params, queryset=Book.objects.order_by('id'), request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        rows = filterset.qs.values_list(*self.export_lookups).iterator(chunk_size=self.chunk_size)
+        
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(self.export_columns, rows),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="books.{renderer.format}"'
+        return response
+
+
 # ========================
 # AUTHOR VIEWS (Basic implementation)
 # ========================
 
-class AuthorListView(generics.ListAPIView):
+class AuthorQuerysetMixin:
+    """
+    Shared queryset for the author read views.
+    
+    Book counts and publication year ranges are annotated in the author
+    query itself. The books are only prefetched (one extra query) when the
+    response includes them, i.e. with ?expand=books.
+    """
+    
+    def get_queryset(self):
+        # Meta.ordering is not applied to aggregating queries, so restate it
+        queryset = (
+            Author.objects.with_book_counts()
+            .with_publication_year_range()
+            .order_by(*Author._meta.ordering)
+        )
+        if expands_books(self.request):
+            queryset = queryset.prefetch_related('books')
+        return queryset
+
+
+class AuthorListView(ServerTimingMixin, AuthorQuerysetMixin, generics.ListAPIView):
     """
     ListView for authors (basic implementation).
     
+    Book counts and year ranges come from annotations, so a page of authors
+    costs the same number of queries however many authors and books it
+    contains: the pagination COUNT and the authors, plus one prefetch query
+    with ?expand=books.
+    
     URL: GET /api/authors/
+    URL: GET /api/authors/?expand=books
+    URL: GET /api/authors/?fields=id,name,book_count
     """
-    queryset = Author.objects.all().prefetch_related('books')
     serializer_class = AuthorSerializer
     permission_classes = [permissions.AllowAny]
 
 
-class AuthorDetailView(generics.RetrieveAPIView):
+class AuthorDetailView(ServerTimingMixin, ConditionalRetrieveMixin, AuthorQuerysetMixin, generics.RetrieveAPIView):
     """
     DetailView for retrieving a single author.
     
+    Supports conditional GETs through an ETag built from the author's
+    updated_at and the number and latest updated_at of their books, so adding,
+    editing or deleting a nested book changes it too.
+    
     URL: GET /api/authors/<int:pk>/
+    URL: GET /api/authors/<int:pk>/?expand=books
     """
-    queryset = Author.objects.all().prefetch_related('books')
     serializer_class = AuthorSerializer
     permission_classes = [permissions.AllowAny]
+    
+    def get_validators(self, lookup):
+        """No Last-Modified: a deleted book leaves no newer timestamp behind."""
+        row = (
+            Author.objects.filter(**lookup)
+            .annotate(book_total=Count('books'), books_updated_at=Max('books__updated_at'))
+            .values('pk', 'updated_at', 'book_total', 'books_updated_at')
+            .first()
+        )
+        if row is None:
+            return None
+        return tuple(row.values()), None
 
 
-class AuthorCreateView(generics.CreateAPIView):
+class AuthorCreateView(ServerTimingMixin, generics.CreateAPIView):
     """
     CreateView for adding a new author.
     
@@ -186,10 +491,8 @@ def book_search(request):
     books = Book.objects.select_related('author')
     
     if query:
-        books = books.filter(
-            Q(title__icontains=query) | 
-            Q(author__name__icontains=query)
-        )
+        # Title/author substring match served by the trigram indexes
+        books = books.filter(book_search_condition(query))
     
     if min_year:
         books = books.filter(publication_year__gte=min_year)
@@ -200,11 +503,13 @@ def book_search(request):
     books = books[:20]  # Limit results
     
     serializer = BookSerializer(books, many=True)
+    with timed(request, 'serialize'):
+        results = serializer.data
     
     return Response({
         'query': query,
-        'results_count': len(serializer.data),
-        'results': serializer.data
+        'results_count': len(results),
+        'results': results
     })
 
 
@@ -214,13 +519,86 @@ def author_statistics(request):
     """
     Statistics endpoint for authors.
     
+    Reads the materialized statistics (see api/stats.py), so a request is
+    one small lookup whatever the size of the catalog. The counters are
+    updated as books and authors change and periodically reconciled by
+    `manage.py reconcile_statistics`.
+    
+    QUERY PARAMETERS:
+    - author: return that author's statistics instead of the catalog's
+    
     URL: GET /api/authors/stats/
     """
-    from django.db.models import Count, Min, Max
+    author_id = request.query_params.get('author')
+    if author_id is not None:
+        if not author_id.isdigit():
+            raise ValidationError({'author': 'Must be an author id.'})
+        author_stats = (
+            AuthorStatistics.objects.filter(author_id=author_id)
+            .values('book_count', 'earliest_publication_year', 'latest_publication_year')
+            .first()
+        )
+        if author_stats is None:
+            # Authors without books have no statistics row
+            get_object_or_404(Author, pk=author_id)
+            author_stats = {'book_count': 0, 'earliest_publication_year': None, 'latest_publication_year': None}
+        return Response({'author': int(author_id), **author_stats})
     
-    stats = Author.objects.aggregate(
-        total_authors=Count('id'),
-        total_books=Count('books')
-    )
+    return Response(stats.get_catalog_statistics())
+
+
+# Typeahead limits: results per type, and the shortest and longest accepted query
+TYPEAHEAD_DEFAULT_LIMIT = 10
+TYPEAHEAD_MAX_LIMIT = 50
+TYPEAHEAD_MAX_QUERY_LENGTH = 100
+TYPEAHEAD_MIN_QUERY_LENGTH = MIN_TRIGRAM_LENGTH
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def catalog_typeahead(request):
+    """
+    Autocomplete endpoint returning the best matching books and authors.
     
-    return Response(stats)
\ No newline at end of file
+    Matches are found through the trigram indexes on Book.title and
+    Author.name (see api/search.py), so each keystroke is an index lookup
+    rather than a scan of the catalog. Results are ranked by match quality:
+    exact, prefix, word-prefix, then any substring; shorter values first.
+    
+    Queries shorter than three characters return no results: they cannot
+    use a trigram index and would match most of the catalog anyway.
+    
+    QUERY PARAMETERS:
+    - q: text typed so far (required, at least 3 characters)
+    - limit: maximum results per type (default 10, at most 50)
+    
+    URL: GET /api/typeahead/?q=harr
+    """
+    query = request.query_params.get('q', '').strip()[:TYPEAHEAD_MAX_QUERY_LENGTH]
+    try:
+        limit = int(request.query_params.get('limit', TYPEAHEAD_DEFAULT_LIMIT))
+    except ValueError:
+        limit = TYPEAHEAD_DEFAULT_LIMIT
+    limit = max(1, min(limit, TYPEAHEAD_MAX_LIMIT))
+    
+    if len(query) < TYPEAHEAD_MIN_QUERY_LENGTH:
+        return Response({'query': query, 'books': [], 'authors': []})
+    
+    books = typeahead(Book, 'title', query, limit).values(
+        'id', 'title', 'publication_year', 'author_id', 'author__name'
+    )
+    authors = typeahead(Author, 'name', query, limit).values('id', 'name')
+    return Response({
+        'query': query,
+        'books': [
+            {
+                'id': book['id'],
+                'title': book['title'],
+                'publication_year': book['publication_year'],
+                'author': book['author_id'],
+                'author_name': book['author__name'],
+            }
+            for book in books
+        ],
+        'authors': list(authors),
+    })
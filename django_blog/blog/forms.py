@@ -1,5 +1,9 @@
+from django import forms
+from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.models import User
 from taggit.forms import TagWidget
-from .models import Comment
+
+from .models import Comment, Post
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -8,7 +12,6 @@ class CommentForm(forms.ModelForm):
         widgets = {
             'content': forms.Textarea(attrs={'rows': 3, 'placeholder': 'Add a comment...'})
         }
-from .models import Post
 
 class PostForm(forms.ModelForm):
     tags = forms.CharField(required=False, help_text='Comma-separated tags', widget=TagWidget())
@@ -31,9 +34,6 @@ class PostForm(forms.ModelForm):
         else:
             self._tags = tags
         return instance
-from django import forms
-from django.contrib.auth.forms import UserCreationForm
-from django.contrib.auth.models import User
 
 class UserRegisterForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -20,6 +20,7 @@ class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     published_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     author= models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
 
     tags = TaggableManager(blank=True)
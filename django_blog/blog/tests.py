@@ -1,3 +1,34 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Post
+
+
+class PostDetailConditionalGetTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass')
+        self.post = Post.objects.create(title='Hello', content='body', author=self.author)
+        self.url = reverse('post-detail', args=[self.post.pk])
+
+    def test_matching_etag_returns_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_when_post_is_edited(self):
+        etag = self.client.get(self.url)['ETag']
+        self.post.title = 'Edited'
+        self.post.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_viewing_user(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_login(self.author)
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+
+    def test_missing_post_is_404(self):
+        self.assertEqual(self.client.get(reverse('post-detail', args=[self.post.pk + 1])).status_code, 404)
@@ -1,11 +1,3 @@
-from .views import PostByTagListView
-    path('tags/<slug:tag_slug>/', PostByTagListView.as_view(), name='post-by-tag'),
-    path('tags/<str:tag_name>/', views.posts_by_tag, name='post-by-tag'),
-    path('search/', views.post_search, name='post-search'),
-    # Comment CRUD
-    path('post/<int:pk>/comments/new/', views.CommentCreateView.as_view(), name='comment-create'),
-    path('comment/<int:pk>/update/', views.CommentUpdateView.as_view(), name='comment-update'),
-    path('comment/<int:pk>/delete/', views.CommentDeleteView.as_view(), name='comment-delete'),
 from django.urls import path
 from . import views
 
@@ -21,4 +13,14 @@ urlpatterns = [
     path('post/<int:pk>/', views.PostDetailView.as_view(), name='post-detail'),
     path('post/<int:pk>/update/', views.PostUpdateView.as_view(), name='post-update'),
     path('post/<int:pk>/delete/', views.PostDeleteView.as_view(), name='post-delete'),
+
+    # Tags and search
+    path('tags/<slug:tag_slug>/', views.PostByTagListView.as_view(), name='post-by-tag'),
+    path('tags/<str:tag_name>/', views.posts_by_tag, name='post-by-tag'),
+    path('search/', views.post_search, name='post-search'),
+
+    # Comment CRUD
+    path('post/<int:pk>/comments/new/', views.CommentCreateView.as_view(), name='comment-create'),
+    path('comment/<int:pk>/update/', views.CommentUpdateView.as_view(), name='comment-update'),
+    path('comment/<int:pk>/delete/', views.CommentDeleteView.as_view(), name='comment-delete'),
 ]
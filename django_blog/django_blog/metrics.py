@@ -0,0 +1,288 @@
+"""
+Prometheus-style metrics.
+
+MetricsMiddleware records, per route (URL name):
+
+    http_requests_total             counter, by method/route/status
+    http_request_duration_seconds   histogram, by method/route
+    db_queries_total                counter, by route
+    cache_requests_total            counter, by cache/result (hit or miss),
+                                    fed by record_cache_lookup()
+
+The metrics view serves them in the text exposition format, together with a
+derived cache_hit_ratio gauge per cache. It answers only clients whose
+address is in ALLOWED_IPS (the scraper) and logged-in staff users; everyone
+else gets 403.
+
+Every process keeps its own values in memory. When a shared DIRECTORY is
+configured, as it must be under gunicorn with several workers, each process
+also writes a snapshot to <DIRECTORY>/metrics-<pid>.json at most once every
+WRITE_INTERVAL seconds (and at exit). The view sums the snapshots from every
+file, so whichever worker answers the scrape reports the totals.
+
+Settings:
+
+    METRICS = {
+        'ENABLED': True,
+        'DIRECTORY': None,     # defaults to $PROMETHEUS_MULTIPROC_DIR
+        'WRITE_INTERVAL': 1.0,
+        'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+        'ALLOWED_IPS': ('127.0.0.1', '::1'),
+    }
+"""
+import atexit
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'DIRECTORY': None,
+    'WRITE_INTERVAL': 1.0,
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),
+}
+
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by method, route and status.'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by method and route.'),
+    'db_queries_total': ('counter', 'SQL queries executed while serving requests, by route.'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result.'),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def get_config():
+    config = {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+    if config['DIRECTORY'] is None:
+        config['DIRECTORY'] = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    return config
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (name, labels) -> value; labels is a tuple of (key, value) pairs
+        self._counters = defaultdict(float)
+        # (name, labels) -> [count per bucket..., sum]
+        self._histograms = {}
+        self._last_write = 0.0
+
+    def inc(self, name, labels, amount=1):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            values = self._histograms.get(key)
+            if values is None:
+                values = self._histograms[key] = [0] * (len(buckets) + 2)
+            # Per-bucket counts; the cumulative `le` counts are built on output
+            values[bisect.bisect_left(buckets, value)] += 1
+            values[-1] += value
+
+    def snapshot(self, buckets):
+        with self._lock:
+            return {
+                'buckets': list(buckets),
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, labels, list(values)] for (name, labels), values in self._histograms.items()],
+            }
+
+    def write(self, directory, buckets):
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(self.snapshot(buckets), handle)
+        os.replace(tmp_path, path)
+        self._last_write = time.monotonic()
+
+    def maybe_write(self, config):
+        if config['DIRECTORY'] and time.monotonic() - self._last_write >= config['WRITE_INTERVAL']:
+            try:
+                self.write(config['DIRECTORY'], config['BUCKETS'])
+            except OSError:
+                logger.exception('Failed to write metrics snapshot')
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _write_at_exit():
+    config = get_config()
+    if config['DIRECTORY']:
+        try:
+            registry.write(config['DIRECTORY'], config['BUCKETS'])
+        except OSError:
+            pass
+
+
+atexit.register(_write_at_exit)
+
+
+def record_cache_lookup(cache, hit):
+    registry.inc('cache_requests_total', {'cache': cache, 'result': 'hit' if hit else 'miss'})
+
+
+def collect(config):
+    """Merge this process's metrics with the snapshots of every other process."""
+    snapshots = [registry.snapshot(config['BUCKETS'])]
+    directory = config['DIRECTORY']
+    if directory:
+        # A scrape must not fail because the directory is full or unwritable;
+        # this process's own values come from memory either way
+        registry.maybe_write({**config, 'WRITE_INTERVAL': 0})
+        try:
+            filenames = sorted(os.listdir(directory))
+        except OSError:
+            logger.exception('Failed to list metrics snapshots')
+            filenames = []
+        own = f'metrics-{os.getpid()}.json'
+        for filename in filenames:
+            if filename == own or not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as handle:
+                    snapshots.append(json.load(handle))
+            except (OSError, ValueError):
+                continue
+
+    counters = defaultdict(float)
+    histograms = {}
+    buckets = list(config['BUCKETS'])
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        if snapshot['buckets'] != buckets:
+            # Written before a bucket change; its latencies cannot be merged
+            continue
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                merged[i] += value
+    return counters, histograms, buckets
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_metrics(counters, histograms, buckets):
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+            continue
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, le=bound)} {cumulative}')
+            cumulative += values[len(buckets)]
+            lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(values[-1])}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+
+    lookups = defaultdict(lambda: {'hit': 0, 'miss': 0})
+    for (metric, labels), value in counters.items():
+        if metric == 'cache_requests_total':
+            labels = dict(labels)
+            lookups[labels['cache']][labels['result']] += value
+    lines += ['# HELP cache_hit_ratio Share of cache lookups that were hits.', '# TYPE cache_hit_ratio gauge']
+    for cache, results in sorted(lookups.items()):
+        total = results['hit'] + results['miss']
+        lines.append(f'cache_hit_ratio{_labels((("cache", cache),))} {results["hit"] / total if total else 0:.4f}')
+    return '\n'.join(lines) + '\n'
+
+
+def can_scrape(request, config):
+    if request.META.get('REMOTE_ADDR') in config['ALLOWED_IPS']:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_active and user.is_staff)
+
+
+def metrics_view(request):
+    config = get_config()
+    if not can_scrape(request, config):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(*collect(config)), content_type=CONTENT_TYPE)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Keep this first in MIDDLEWARE so the latency covers the whole stack."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        registry.inc('http_requests_total', {
+            'method': request.method, 'route': route, 'status': str(response.status_code),
+        })
+        registry.observe(
+            'http_request_duration_seconds', {'method': request.method, 'route': route},
+            duration, config['BUCKETS'],
+        )
+        if queries.count:
+            registry.inc('db_queries_total', {'route': route}, queries.count)
+        registry.maybe_write(config)
+        return response
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'django_blog.metrics.MetricsMiddleware',
+    'django_blog.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -131,3 +133,22 @@ STATICFILES_DIRS = [
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Per-URL-name SQL query budgets enforced by QueryBudgetMiddleware
+QUERY_BUDGETS = {
+    'post-list': 6,
+    'post-detail': 6,
+}
+QUERY_BUDGET_DEFAULT = None
+# Raise QueryBudgetExceeded instead of warning; the test runner sets it to True
+QUERY_BUDGET_RAISE = False
+TEST_RUNNER = 'django_blog.test_runner.QueryBudgetTestRunner'
+
+# Prometheus-style metrics served at /metrics/ (django_blog.metrics).
+# Point DIRECTORY (or $PROMETHEUS_MULTIPROC_DIR) at a directory shared by all
+# workers so every scrape reports the totals of the whole server.
+METRICS = {
+    'ENABLED': True,
+    'DIRECTORY': None,
+    'WRITE_INTERVAL': 1.0,
+}
@@ -0,0 +1,98 @@
+"""
+Token authentication with an in-process token -> user cache.
+
+CachedTokenAuthentication keeps recent lookups in a bounded LRU with a TTL,
+so authenticated requests skip the Token/user query. Entries are dropped when
+the token is saved or deleted, when the user is saved (see accounts.signals)
+and when follow counters are updated in bulk.
+
+The cache is per worker process, and those invalidations only reach the
+process that made the change: a token deleted or rotated through one worker
+keeps authenticating on the others until their entry expires. The TTL is
+that window, so it defaults to a few seconds.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from social_media_api.metrics import record_cache_lookup
+
+DEFAULTS = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 5,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+
+class TokenCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, user, token = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return user, token
+
+    def set(self, key, user, token):
+        config = get_config()
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + config['TTL'], user, token)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > config['MAX_ENTRIES']:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            user_keys = self._keys_by_user.get(entry[1].pk)
+            if user_keys is not None:
+                user_keys.discard(key)
+                if not user_keys:
+                    del self._keys_by_user[entry[1].pk]
+
+    def invalidate_key(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        record_cache_lookup('token_auth', cached is not None)
+        if cached is not None:
+            user, token = cached
+            # Hand each request its own instance so view-side mutations stay local
+            return copy.copy(user), token
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
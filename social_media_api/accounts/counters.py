@@ -0,0 +1,55 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .authentication import token_cache
+from .models import CustomUser, Follow
+
+
+def lock_follower(follower_id):
+	"""
+	Lock the follower's row for the rest of the transaction, so concurrent
+	follow requests by the same user see each other's edges and the counters
+	are adjusted by the rows actually inserted.
+	"""
+	list(CustomUser.objects.select_for_update().filter(pk=follower_id).values_list('pk', flat=True))
+
+
+def adjust_follow_counts(follower_id, followee_ids, delta):
+	"""Apply a follow (delta=1) or unfollow (delta=-1) of `followee_ids` to the counters."""
+	followee_ids = list(followee_ids)
+	if not followee_ids:
+		return
+	CustomUser.objects.filter(pk=follower_id).update(
+		following_count=Greatest(F('following_count') + delta * len(followee_ids), 0)
+	)
+	CustomUser.objects.filter(pk__in=followee_ids).update(
+		follower_count=Greatest(F('follower_count') + delta, 0)
+	)
+	token_cache.invalidate_user(follower_id)
+	for followee_id in followee_ids:
+		token_cache.invalidate_user(followee_id)
+
+
+def _edge_count(field):
+	counts = Follow.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(total=Count('pk')).values('total')
+	return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def reconcile_follow_counts():
+	"""
+	Recompute follower_count and following_count from the Follow table for
+	every user whose counters have drifted. Returns the number of users fixed.
+	"""
+	followers = _edge_count('followee')
+	following = _edge_count('follower')
+	drifted = list(CustomUser.objects.annotate(
+		actual_followers=followers, actual_following=following,
+	).filter(
+		~Q(follower_count=F('actual_followers')) | ~Q(following_count=F('actual_following'))
+	).values_list('pk', flat=True))
+	fixed = CustomUser.objects.filter(pk__in=drifted).update(
+		follower_count=followers, following_count=following,
+	)
+	for user_id in drifted:
+		token_cache.invalidate_user(user_id)
+	return fixed
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from accounts.counters import reconcile_follow_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute drifted follower_count/following_count values on users.'
+
+    def handle(self, *args, **options):
+        fixed = reconcile_follow_counts()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled follow counters on {fixed} users.'))
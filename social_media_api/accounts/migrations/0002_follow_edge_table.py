@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_follow_edges(apps, schema_editor):
+    """Merge the old `following` and `followers` M2M tables into Follow."""
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Follow = apps.get_model('accounts', 'Follow')
+    following = CustomUser.following.through.objects.values_list('from_customuser_id', 'to_customuser_id')
+    followers = CustomUser.followers.through.objects.values_list('to_customuser_id', 'from_customuser_id')
+    edges = {(follower_id, followee_id) for follower_id, followee_id in following.iterator()}
+    edges.update((follower_id, followee_id) for follower_id, followee_id in followers.iterator())
+    Follow.objects.bulk_create(
+        [Follow(follower_id=follower_id, followee_id=followee_id) for follower_id, followee_id in edges
+         if follower_id != followee_id],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('followee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to=settings.AUTH_USER_MODEL)),
+                ('follower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['followee', 'follower'], name='follow_followee_idx')],
+                'constraints': [models.UniqueConstraint(fields=('follower', 'followee'), name='unique_follow_edge')],
+            },
+        ),
+        migrations.RunPython(copy_follow_edges, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='followers',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='following',
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following',
+            field=models.ManyToManyField(blank=True, related_name='followers', through='accounts.Follow', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -1,4 +1,5 @@
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -6,8 +7,32 @@ from django.db import models
 class CustomUser(AbstractUser):
 	bio = models.TextField(blank=True, null=True)
 	profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
-	followers = models.ManyToManyField('self', symmetrical=False, related_name='user_followers', blank=True)
-	following = models.ManyToManyField('self', symmetrical=False, related_name='user_following', blank=True)
+	# Both directions of the follow graph read the single Follow edge table:
+	# `user.following` are the users they follow, `user.followers` follow them.
+	following = models.ManyToManyField(
+		'self', symmetrical=False, through='Follow', related_name='followers', blank=True
+	)
+	# Denormalized edge counts, maintained by accounts.counters on follow/unfollow
+	follower_count = models.PositiveIntegerField(default=0)
+	following_count = models.PositiveIntegerField(default=0)
 
 	def __str__(self):
 		return self.username
+
+
+class Follow(models.Model):
+	follower = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='following_edges')
+	followee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='follower_edges')
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=['follower', 'followee'], name='unique_follow_edge'),
+		]
+		indexes = [
+			models.Index(fields=['followee', '-created_at', '-id'], name='follow_followee_idx'),
+			models.Index(fields=['follower', '-created_at', '-id'], name='follow_follower_idx'),
+		]
+
+	def __str__(self):
+		return f'{self.follower_id} follows {self.followee_id}'
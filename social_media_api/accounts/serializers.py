@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.authtoken.models import Token
 
+from .models import Follow
+
 User = get_user_model()
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -27,5 +29,28 @@ class RegisterSerializer(serializers.ModelSerializer):
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'followers', 'following')
-        read_only_fields = ('followers', 'following')
+        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'follower_count', 'following_count')
+        read_only_fields = ('follower_count', 'following_count')
+
+class FollowerSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='follower.id')
+    username = serializers.CharField(source='follower.username')
+    followed_at = serializers.DateTimeField(source='created_at')
+
+    class Meta:
+        model = Follow
+        fields = ('id', 'username', 'followed_at')
+
+class FollowingSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='followee.id')
+    username = serializers.CharField(source='followee.username')
+    followed_at = serializers.DateTimeField(source='created_at')
+
+    class Meta:
+        model = Follow
+        fields = ('id', 'username', 'followed_at')
+
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=200
+    )
@@ -1,3 +1,144 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from posts.pagination import KeysetPagination
+
+from .authentication import token_cache
+from .models import CustomUser, Follow
+
+
+class FollowTests(APITestCase):
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user(username='alice', password='pass')
+        self.bob = CustomUser.objects.create_user(username='bob', password='pass')
+        self.client.force_authenticate(self.alice)
+
+    def test_follow_writes_one_edge_read_from_both_sides(self):
+        self.client.post(reverse('follow-user', args=[self.bob.id]))
+        self.client.post(reverse('follow-user', args=[self.bob.id]))
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(list(self.alice.following.all()), [self.bob])
+        self.assertEqual(list(self.bob.followers.all()), [self.alice])
+
+    def test_unfollow_deletes_the_edge(self):
+        Follow.objects.create(follower=self.alice, followee=self.bob)
+        response = self.client.post(reverse('unfollow-user', args=[self.bob.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_cannot_follow_self(self):
+        response = self.client.post(reverse('follow-user', args=[self.alice.id]))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Follow.objects.exists())
+
+
+class FollowListingTests(APITestCase):
+    def setUp(self):
+        self.star = CustomUser.objects.create_user(username='star', password='pass')
+        self.fans = [CustomUser.objects.create_user(username=f'fan{i}', password='pass') for i in range(5)]
+        for fan in self.fans:
+            self.client.force_authenticate(fan)
+            self.client.post(reverse('follow-user', args=[self.star.id]))
+        self.star.refresh_from_db()
+        self.client.force_authenticate(self.star)
+
+    def test_profile_returns_counts_instead_of_id_lists(self):
+        data = self.client.get(reverse('profile')).data
+        self.assertNotIn('followers', data)
+        self.assertEqual((data['follower_count'], data['following_count']), (5, 0))
+
+    def test_unfollow_decrements_counts(self):
+        self.client.force_authenticate(self.fans[0])
+        self.client.post(reverse('unfollow-user', args=[self.star.id]))
+        self.fans[0].refresh_from_db()
+        self.star.refresh_from_db()
+        self.assertEqual((self.star.follower_count, self.fans[0].following_count), (4, 0))
+
+    def test_followers_are_cursor_paginated(self):
+        response = self.client.get(reverse('my-followers'), {'page_size': 3})
+        names = [user['username'] for user in response.data['results']]
+        response = self.client.get(response.data['next'])
+        names += [user['username'] for user in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(names, ['fan4', 'fan3', 'fan2', 'fan1', 'fan0'])
+
+    def test_tampered_cursor_is_rejected(self):
+        cursor = KeysetPagination().encode_cursor(['2024-01-01T00:00:00', 'zz'], reverse=False)
+        response = self.client.get(reverse('my-followers'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_following_for_another_user(self):
+        response = self.client.get(reverse('user-following', args=[self.fans[0].id]))
+        self.assertEqual([user['username'] for user in response.data['results']], ['star'])
+
+
+class BulkFollowTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='newbie', password='pass')
+        self.suggested = [CustomUser.objects.create_user(username=f'suggested{i}', password='pass') for i in range(3)]
+        Follow.objects.create(follower=self.user, followee=self.suggested[0])
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_follow_reports_each_id(self):
+        ids = [s.id for s in self.suggested] + [self.user.id, 9999]
+        response = self.client.post(reverse('bulk-follow'), {'user_ids': ids}, format='json')
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['already_following', 'followed', 'followed', 'self', 'not_found'])
+        self.assertEqual(Follow.objects.filter(follower=self.user).count(), 3)
+        self.suggested[1].refresh_from_db()
+        self.assertEqual(self.suggested[1].follower_count, 1)
+
+    def test_bulk_follow_is_a_fixed_number_of_queries(self):
+        ids = [s.id for s in self.suggested[1:]]
+        # Includes the lock on the follower's row
+        with self.assertNumQueries(9):
+            self.client.post(reverse('bulk-follow'), {'user_ids': ids}, format='json')
+
+    def test_reconcile_command_fixes_drifted_follow_counts(self):
+        CustomUser.objects.filter(pk=self.suggested[0].pk).update(follower_count=5)
+        CustomUser.objects.filter(pk=self.user.pk).update(following_count=0)
+        out = StringIO()
+        call_command('reconcile_follow_counters', stdout=out)
+        self.assertIn('on 2 users', out.getvalue())
+        self.suggested[0].refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual((self.suggested[0].follower_count, self.user.following_count), (1, 1))
+
+    def test_bulk_unfollow(self):
+        ids = [self.suggested[0].id, self.suggested[1].id]
+        response = self.client.post(reverse('bulk-unfollow'), {'user_ids': ids}, format='json')
+        self.assertEqual([r['status'] for r in response.data['results']], ['unfollowed', 'not_following'])
+        self.assertFalse(Follow.objects.filter(follower=self.user).exists())
+
+    def test_rejects_empty_list(self):
+        response = self.client.post(reverse('bulk-follow'), {'user_ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = CustomUser.objects.create_user(username='cached', password='pass')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_requests_skip_the_token_query(self):
+        self.client.get(reverse('profile'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.data['username'], 'cached')
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(reverse('profile'))
+        self.token.delete()
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+
+    def test_user_save_refreshes_cached_user(self):
+        self.client.get(reverse('profile'))
+        self.user.bio = 'updated'
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('profile')).data['bio'], 'updated')
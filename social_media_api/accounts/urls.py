@@ -1,5 +1,8 @@
 from django.urls import path
-from .views import RegisterView, CustomAuthToken, ProfileView, FollowUserView, UnfollowUserView
+from .views import (
+    RegisterView, CustomAuthToken, ProfileView, FollowUserView, UnfollowUserView,
+    FollowerListView, FollowingListView, BulkFollowView, BulkUnfollowView,
+)
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
@@ -7,4 +10,10 @@ urlpatterns = [
     path('profile/', ProfileView.as_view(), name='profile'),
     path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('unfollow/bulk/', BulkUnfollowView.as_view(), name='bulk-unfollow'),
+    path('followers/', FollowerListView.as_view(), name='my-followers'),
+    path('following/', FollowingListView.as_view(), name='my-following'),
+    path('users/<int:user_id>/followers/', FollowerListView.as_view(), name='user-followers'),
+    path('users/<int:user_id>/following/', FollowingListView.as_view(), name='user-following'),
 ]
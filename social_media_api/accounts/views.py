@@ -1,5 +1,22 @@
 from rest_framework.views import APIView
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+
+from posts.feed import (
+	backfill_timeline, backfill_timelines, remove_authors_from_timeline, remove_from_timeline,
+)
+from posts.pagination import KeysetPagination
+
+from .counters import adjust_follow_counts, lock_follower
+from .models import CustomUser, Follow
+from .serializers import (
+	BulkFollowSerializer, FollowerSerializer, FollowingSerializer, RegisterSerializer, UserSerializer,
+)
+
 class FollowUserView(APIView):
 	permission_classes = [permissions.IsAuthenticated]
 
@@ -7,8 +24,15 @@ class FollowUserView(APIView):
 		user_to_follow = get_object_or_404(CustomUser, id=user_id)
 		if user_to_follow == request.user:
 			return Response({'detail': 'You cannot follow yourself.'}, status=400)
-		request.user.following.add(user_to_follow)
-		user_to_follow.followers.add(request.user)
+		try:
+			with transaction.atomic():
+				lock_follower(request.user.id)
+				Follow.objects.create(follower=request.user, followee=user_to_follow)
+				adjust_follow_counts(request.user.id, [user_to_follow.id], 1)
+		except IntegrityError:
+			pass
+		else:
+			backfill_timeline(request.user, user_to_follow)
 		return Response({'detail': f'You are now following {user_to_follow.username}.'})
 
 class UnfollowUserView(APIView):
@@ -16,18 +40,69 @@ class UnfollowUserView(APIView):
 
 	def post(self, request, user_id):
 		user_to_unfollow = get_object_or_404(CustomUser, id=user_id)
-		request.user.following.remove(user_to_unfollow)
-		user_to_unfollow.followers.remove(request.user)
+		with transaction.atomic():
+			deleted, _ = Follow.objects.filter(follower=request.user, followee=user_to_unfollow).delete()
+			if deleted:
+				adjust_follow_counts(request.user.id, [user_to_unfollow.id], -1)
+		remove_from_timeline(request.user, user_to_unfollow)
 		return Response({'detail': f'You have unfollowed {user_to_unfollow.username}.'})
 
 
-from rest_framework import generics, permissions
-from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.authtoken.models import Token
-from rest_framework.response import Response
+class BulkFollowView(APIView):
+	"""Follow many users at once: POST {"user_ids": [...]} returns a status per id."""
+	permission_classes = [permissions.IsAuthenticated]
+
+	def post(self, request):
+		serializer = BulkFollowSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		user_ids = list(dict.fromkeys(serializer.validated_data['user_ids']))
+		users = CustomUser.objects.in_bulk(user_ids)
+		results = {}
+		to_follow = []
+		with transaction.atomic():
+			# Existing edges are read under the follower lock, so the counters
+			# move by exactly the edges inserted here
+			lock_follower(request.user.id)
+			already = set(
+				Follow.objects.filter(follower=request.user, followee_id__in=users).values_list('followee_id', flat=True)
+			)
+			for user_id in user_ids:
+				if user_id not in users:
+					results[user_id] = 'not_found'
+				elif user_id == request.user.id:
+					results[user_id] = 'self'
+				elif user_id in already:
+					results[user_id] = 'already_following'
+				else:
+					results[user_id] = 'followed'
+					to_follow.append(users[user_id])
+			Follow.objects.bulk_create(
+				[Follow(follower=request.user, followee=user) for user in to_follow], ignore_conflicts=True
+			)
+			adjust_follow_counts(request.user.id, [user.id for user in to_follow], 1)
+		backfill_timelines(request.user, to_follow)
+		return Response({'results': [{'id': user_id, 'status': results[user_id]} for user_id in user_ids]})
+
+class BulkUnfollowView(APIView):
+	"""Unfollow many users at once: POST {"user_ids": [...]} returns a status per id."""
+	permission_classes = [permissions.IsAuthenticated]
+
+	def post(self, request):
+		serializer = BulkFollowSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		user_ids = list(dict.fromkeys(serializer.validated_data['user_ids']))
+		with transaction.atomic():
+			edges = Follow.objects.select_for_update().filter(follower=request.user, followee_id__in=user_ids)
+			following = set(edges.values_list('followee_id', flat=True))
+			edges.delete()
+			adjust_follow_counts(request.user.id, following, -1)
+		remove_authors_from_timeline(request.user, following)
+		results = [
+			{'id': user_id, 'status': 'unfollowed' if user_id in following else 'not_following'}
+			for user_id in user_ids
+		]
+		return Response({'results': results})
 
-from .models import CustomUser
-from .serializers import RegisterSerializer, UserSerializer
 
 class RegisterView(generics.GenericAPIView):
 	queryset = CustomUser.objects.all()
@@ -58,3 +133,23 @@ class ProfileView(generics.RetrieveUpdateAPIView):
 
 	def get_object(self):
 		return self.request.user
+
+class FollowerListView(generics.ListAPIView):
+	"""Users following `user_id` (or the caller), newest first, cursor-paginated."""
+	serializer_class = FollowerSerializer
+	permission_classes = [permissions.IsAuthenticated]
+	pagination_class = KeysetPagination
+
+	def get_queryset(self):
+		user_id = self.kwargs.get('user_id', self.request.user.id)
+		return Follow.objects.filter(followee_id=user_id).select_related('follower')
+
+class FollowingListView(generics.ListAPIView):
+	"""Users that `user_id` (or the caller) follows, newest first, cursor-paginated."""
+	serializer_class = FollowingSerializer
+	permission_classes = [permissions.IsAuthenticated]
+	pagination_class = KeysetPagination
+
+	def get_queryset(self):
+		user_id = self.kwargs.get('user_id', self.request.user.id)
+		return Follow.objects.filter(follower_id=user_id).select_related('followee')
@@ -0,0 +1,54 @@
+"""
+Cached per-recipient unread notification counts.
+
+The count is computed once per recipient and cached; after that the pipeline
+and the mark-read view adjust it in place, so badge polling is a cache read.
+A missing key is recomputed lazily, and the timeout bounds any drift.
+
+Counts drift when writes bypass these helpers (admin edits, cascading
+deletes), and also whenever the default cache is per process: the default
+LocMemCache is, so the pipeline flush and mark-read only adjust the count
+cached by their own worker, and other workers serve a stale badge until the
+key expires. The timeout is therefore a few seconds by default. Raise
+NOTIFICATIONS_UNREAD_COUNT_TIMEOUT only when CACHES points at a backend
+shared by all workers (Redis, Memcached, database).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from social_media_api.metrics import record_cache_lookup
+
+from .models import Notification
+
+UNREAD_COUNT_TIMEOUT = 5
+
+
+def get_timeout():
+    return getattr(settings, 'NOTIFICATIONS_UNREAD_COUNT_TIMEOUT', UNREAD_COUNT_TIMEOUT)
+
+
+def unread_count_key(recipient_id):
+    return f'notifications:unread:{recipient_id}'
+
+
+def get_unread_count(recipient_id):
+    key = unread_count_key(recipient_id)
+    count = cache.get(key)
+    record_cache_lookup('unread_count', count is not None)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=recipient_id, unread=True).count()
+        cache.set(key, count, get_timeout())
+    return count
+
+
+def adjust_unread_count(recipient_id, delta):
+    """Apply `delta` to a cached count; a missing key is left to be recomputed."""
+    if not delta:
+        return
+    key = unread_count_key(recipient_id)
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        return
+    if count < 0:
+        cache.delete(key)
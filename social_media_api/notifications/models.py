@@ -12,6 +12,25 @@ class Notification(models.Model):
     target = GenericForeignKey('target_content_type', 'target_object_id')
     timestamp = models.DateTimeField(auto_now_add=True)
     unread = models.BooleanField(default=True)
+    # Number of distinct actors merged into this row by notifications.pipeline
+    actor_count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-timestamp'], name='notif_recipient_ts_idx'),
+            models.Index(fields=['recipient', 'unread', '-timestamp'], name='notif_recipient_unread_ts_idx'),
+        ]
 
     def __str__(self):
         return f'{self.actor} {self.verb} {self.target} to {self.recipient}'
+
+
+class NotificationActor(models.Model):
+    """Distinct actors merged into an aggregated Notification, so repeat actors are counted once."""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='actor_edges')
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'actor'], name='unique_notification_actor'),
+        ]
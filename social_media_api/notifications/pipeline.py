@@ -0,0 +1,182 @@
+"""
+Batched, aggregated notification writes.
+
+Views call `notify()` instead of creating Notification rows themselves.
+Events are queued in-process and written by a background flush every
+FLUSH_INTERVAL seconds, or sooner once MAX_PENDING events are waiting.
+
+A flush groups events by (recipient, verb, target). Each group either
+becomes one new row or is merged into the recipient's existing unread row for
+the same target. The row keeps the latest actor and an actor_count, which the
+serializer renders as "alice and 41 others liked your post". The actors
+already merged into a row are kept in NotificationActor, so an actor who
+acts again while the row is unread is not counted twice.
+
+Set NOTIFICATIONS_PIPELINE['ASYNC'] to False to write each event during the
+request (still aggregated), e.g. in tests.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .counters import adjust_unread_count
+from .models import Notification, NotificationActor
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ASYNC': True,
+    'MAX_PENDING': 1000,
+    'FLUSH_INTERVAL': 2.0,
+}
+
+NotificationEvent = namedtuple(
+    'NotificationEvent', ['recipient_id', 'actor_id', 'verb', 'target_content_type_id', 'target_object_id']
+)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'NOTIFICATIONS_PIPELINE', {})}
+
+
+class NotificationQueue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._timer = None
+
+    def enqueue(self, events):
+        config = get_config()
+        with self._lock:
+            self._events.extend(events)
+            full = len(self._events) >= config['MAX_PENDING']
+            if not full and self._timer is None and config['FLUSH_INTERVAL']:
+                self._timer = threading.Timer(config['FLUSH_INTERVAL'], self._flush_safely)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def _take(self):
+        with self._lock:
+            events, self._events = self._events, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return events
+
+    def _flush_safely(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to flush queued notifications')
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        """Write every queued event. Returns the number of rows created or updated."""
+        return write_events(self._take())
+
+
+def write_events(events):
+    groups = {}
+    for event in events:
+        key = (event.recipient_id, event.verb, event.target_content_type_id, event.target_object_id)
+        actors = groups.setdefault(key, [])
+        if event.actor_id in actors:
+            actors.remove(event.actor_id)
+        actors.append(event.actor_id)
+    if not groups:
+        return 0
+
+    with transaction.atomic():
+        existing = {}
+        object_ids = {key[3] for key in groups}
+        targets = Q(target_object_id__in=object_ids - {None})
+        if None in object_ids:
+            targets |= Q(target_object_id__isnull=True)
+        unread = Notification.objects.select_for_update().filter(
+            targets,
+            recipient_id__in={key[0] for key in groups},
+            verb__in={key[1] for key in groups},
+            unread=True,
+        )
+        for notification in unread:
+            key = (
+                notification.recipient_id, notification.verb,
+                notification.target_content_type_id, notification.target_object_id,
+            )
+            if key in groups:
+                existing.setdefault(key, notification)
+
+        # Actors already counted on the rows being merged into; the rows are
+        # locked above, so no concurrent flush can add to these sets
+        seen = {}
+        if existing:
+            for notification_id, actor_id in NotificationActor.objects.filter(
+                notification__in=existing.values()
+            ).values_list('notification_id', 'actor_id'):
+                seen.setdefault(notification_id, set()).add(actor_id)
+
+        now = timezone.now()
+        to_create, to_update, new_actors = [], [], []
+        for key, actors in groups.items():
+            recipient_id, verb, content_type_id, object_id = key
+            notification = existing.get(key)
+            if notification is None:
+                notification = Notification(
+                    recipient_id=recipient_id,
+                    actor_id=actors[-1],
+                    verb=verb,
+                    target_content_type_id=content_type_id,
+                    target_object_id=object_id,
+                    actor_count=len(actors),
+                )
+                to_create.append(notification)
+                new_actors.append((notification, actors))
+            else:
+                counted = seen.get(notification.pk, set())
+                added = [actor_id for actor_id in actors if actor_id not in counted]
+                notification.actor_id = actors[-1]
+                notification.actor_count += len(added)
+                notification.timestamp = now
+                to_update.append(notification)
+                new_actors.append((notification, added))
+        Notification.objects.bulk_create(to_create)
+        Notification.objects.bulk_update(to_update, ['actor', 'actor_count', 'timestamp'])
+        NotificationActor.objects.bulk_create([
+            NotificationActor(notification_id=notification.pk, actor_id=actor_id)
+            for notification, actors in new_actors
+            for actor_id in actors
+        ])
+    for recipient_id, created in Counter(n.recipient_id for n in to_create).items():
+        adjust_unread_count(recipient_id, created)
+    return len(to_create) + len(to_update)
+
+
+notification_queue = NotificationQueue()
+atexit.register(notification_queue._flush_safely)
+
+
+def notify_many(events):
+    """Record NotificationEvents. Events where the actor is the recipient are dropped."""
+    events = [event for event in events if event.recipient_id != event.actor_id]
+    if get_config()['ASYNC']:
+        notification_queue.enqueue(events)
+    else:
+        write_events(events)
+
+
+def notify(recipient, actor, verb, target=None):
+    content_type_id = object_id = None
+    if target is not None:
+        content_type_id = ContentType.objects.get_for_model(target).id
+        object_id = target.pk
+    notify_many([NotificationEvent(recipient.pk, actor.pk, verb, content_type_id, object_id)])
@@ -4,6 +4,15 @@ from .models import Notification
 class NotificationSerializer(serializers.ModelSerializer):
     actor = serializers.StringRelatedField()
     recipient = serializers.StringRelatedField()
+    summary = serializers.SerializerMethodField()
+
     class Meta:
         model = Notification
-        fields = ['id', 'recipient', 'actor', 'verb', 'target_object_id', 'timestamp', 'unread']
+        fields = ['id', 'recipient', 'actor', 'verb', 'target_object_id', 'timestamp', 'unread', 'actor_count', 'summary']
+        select_related = ['actor', 'recipient']
+
+    def get_summary(self, obj):
+        others = obj.actor_count - 1
+        if others <= 0:
+            return f'{obj.actor} {obj.verb}'
+        return f"{obj.actor} and {others} other{'s' if others > 1 else ''} {obj.verb}"
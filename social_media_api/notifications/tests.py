@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+
+from .models import Notification
+from .pipeline import notification_queue, notify
+
+User = get_user_model()
+
+
+class NotificationPipelineTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', password='pass')
+        self.post = Post.objects.create(author=self.author, title='popular', content='body')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='pass') for i in range(3)]
+
+    @override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': True, 'MAX_PENDING': 100, 'FLUSH_INTERVAL': None})
+    def test_burst_is_written_as_one_aggregated_row(self):
+        for fan in self.fans:
+            self.client.force_authenticate(fan)
+            self.client.post(reverse('like-post', args=[self.post.id]))
+        self.assertFalse(Notification.objects.exists())
+        notification_queue.flush()
+
+        self.client.force_authenticate(self.author)
+        results = self.client.get(reverse('notifications-list')).data
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['actor_count'], 3)
+        self.assertEqual(results[0]['summary'], 'fan2 and 2 others liked your post')
+
+    @override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': False})
+    def test_events_merge_into_unread_row_only(self):
+        notify(self.author, self.fans[0], 'liked your post', target=self.post)
+        notify(self.author, self.fans[1], 'liked your post', target=self.post)
+        self.assertEqual(Notification.objects.get().actor_count, 2)
+        Notification.objects.update(unread=False)
+        notify(self.author, self.fans[2], 'liked your post', target=self.post)
+        self.assertEqual(Notification.objects.filter(unread=True).get().actor_count, 1)
+
+    @override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': False})
+    def test_repeat_actors_are_counted_once(self):
+        for fan in (self.fans[0], self.fans[1], self.fans[0], self.fans[1]):
+            notify(self.author, fan, 'liked your post', target=self.post)
+        notification = Notification.objects.get()
+        self.assertEqual((notification.actor_count, notification.actor_id), (2, self.fans[1].id))
+
+    @override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': False})
+    def test_untargeted_events_merge(self):
+        notify(self.author, self.fans[0], 'followed you')
+        notify(self.author, self.fans[1], 'followed you')
+        self.assertEqual(Notification.objects.get().actor_count, 2)
+
+    @override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': False})
+    def test_self_actions_are_not_notified(self):
+        notify(self.author, self.author, 'liked your post', target=self.post)
+        self.assertFalse(Notification.objects.exists())
+
+
+@override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': False})
+class UnreadCountTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='pass')
+        self.actor = User.objects.create_user(username='actor', password='pass')
+        self.posts = [Post.objects.create(author=self.user, title=f'p{i}', content='body') for i in range(3)]
+        self.client.force_authenticate(self.user)
+
+    def unread_count(self):
+        return self.client.get(reverse('notifications-unread-count')).data['unread_count']
+
+    def test_count_is_cached_and_kept_in_sync(self):
+        notify(self.user, self.actor, 'liked your post', target=self.posts[0])
+        self.assertEqual(self.unread_count(), 1)
+        notify(self.user, self.actor, 'liked your post', target=self.posts[1])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 2)
+
+    def test_mark_read_up_to_id(self):
+        for post in self.posts:
+            notify(self.user, self.actor, 'liked your post', target=post)
+        self.assertEqual(self.unread_count(), 3)
+        middle = Notification.objects.order_by('id')[1]
+        response = self.client.post(reverse('notifications-mark-read'), {'up_to_id': middle.id})
+        self.assertEqual(response.data, {'marked_read': 2, 'unread_count': 1})
+        self.assertEqual(Notification.objects.filter(unread=True).count(), 1)
+
+    def test_mark_read_rejects_bad_timestamp(self):
+        response = self.client.post(reverse('notifications-mark-read'), {'up_to_timestamp': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import NotificationListView
+from .views import NotificationListView, UnreadCountView, MarkReadView
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notifications-list'),
+    path('unread-count/', UnreadCountView.as_view(), name='notifications-unread-count'),
+    path('mark-read/', MarkReadView.as_view(), name='notifications-mark-read'),
 ]
@@ -1,10 +1,43 @@
-from rest_framework import generics, permissions
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from posts.mixins import SerializerRelationsMixin
+from .counters import adjust_unread_count, get_unread_count
 from .models import Notification
 from .serializers import NotificationSerializer
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(SerializerRelationsMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user).order_by('-timestamp')
+
+class UnreadCountView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': get_unread_count(request.user.id)})
+
+class MarkReadView(APIView):
+    """Mark unread notifications read, optionally only those up to `up_to_id` or `up_to_timestamp`."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        notifications = Notification.objects.filter(recipient=request.user, unread=True)
+        up_to_id = request.data.get('up_to_id')
+        up_to_timestamp = request.data.get('up_to_timestamp')
+        if up_to_id is not None:
+            try:
+                notifications = notifications.filter(id__lte=int(up_to_id))
+            except (TypeError, ValueError):
+                return Response({'up_to_id': 'Must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        if up_to_timestamp is not None:
+            timestamp = parse_datetime(str(up_to_timestamp))
+            if timestamp is None:
+                return Response({'up_to_timestamp': 'Must be an ISO 8601 datetime.'}, status=status.HTTP_400_BAD_REQUEST)
+            notifications = notifications.filter(timestamp__lte=timestamp)
+        marked = notifications.update(unread=False)
+        adjust_unread_count(request.user.id, -marked)
+        return Response({'marked_read': marked, 'unread_count': get_unread_count(request.user.id)})
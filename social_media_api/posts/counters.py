@@ -0,0 +1,34 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Like, Post
+
+
+def adjust_counter(post_id, field, delta):
+    """Atomically add `delta` to a Post counter column without reading the row."""
+    Post.objects.filter(pk=post_id).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def _count_subquery(model):
+    counts = model.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount_likes(post_ids):
+    """Set like_count from the Like table for `post_ids` in one UPDATE."""
+    return Post.objects.filter(pk__in=post_ids).update(like_count=_count_subquery(Like))
+
+
+def reconcile_counters(post_model=Post, like_model=Like, comment_model=Comment):
+    """
+    Recompute like_count and comment_count from the Like and Comment tables
+    for every post whose counters have drifted. Returns the number of posts fixed.
+    """
+    like_total = _count_subquery(like_model)
+    comment_total = _count_subquery(comment_model)
+    drifted = post_model.objects.annotate(
+        actual_likes=like_total, actual_comments=comment_total,
+    ).filter(~Q(like_count=F('actual_likes')) | ~Q(comment_count=F('actual_comments')))
+    return post_model.objects.filter(pk__in=drifted.values('pk')).update(
+        like_count=like_total, comment_count=comment_total,
+    )
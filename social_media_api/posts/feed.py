@@ -0,0 +1,90 @@
+"""
+Fan-out-on-write timelines for the feed.
+
+New posts are copied into a TimelineEntry row per follower when they are
+created, so reading a feed is a range scan over the reader's own entries.
+Authors with more followers than FEED_FANOUT_FOLLOWER_THRESHOLD are skipped
+on write and their posts are merged in when the feed is read.
+"""
+from django.conf import settings
+from django.db.models import F, Q
+
+from accounts.models import Follow
+
+from .models import Post, TimelineEntry
+
+FANOUT_BATCH_SIZE = 500
+
+
+def get_follower_threshold():
+    return getattr(settings, 'FEED_FANOUT_FOLLOWER_THRESHOLD', 1000)
+
+
+def is_celebrity(author):
+    return author.follower_count > get_follower_threshold()
+
+
+def fan_out_post(post):
+    """Copy a newly created post into its author's followers' timelines."""
+    if is_celebrity(post.author):
+        return 0
+    follower_ids = Follow.objects.filter(followee_id=post.author_id).values_list('follower_id', flat=True)
+    entries = [
+        TimelineEntry(user_id=follower_id, post=post, author_id=post.author_id, created_at=post.created_at)
+        for follower_id in follower_ids
+    ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+    return len(entries)
+
+
+def backfill_timeline(user, author):
+    """Copy an author's existing posts into a new follower's timeline."""
+    return backfill_timelines(user, [author])
+
+
+def backfill_timelines(user, authors):
+    """Copy the existing posts of several newly followed authors into the user's timeline."""
+    author_ids = [author.id for author in authors if not is_celebrity(author)]
+    if not author_ids:
+        return 0
+    posts = Post.objects.filter(author_id__in=author_ids).values_list('id', 'author_id', 'created_at')
+    entries = [
+        TimelineEntry(user_id=user.id, post_id=post_id, author_id=author_id, created_at=created_at)
+        for post_id, author_id, created_at in posts.iterator()
+    ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+    return len(entries)
+
+
+def remove_from_timeline(user, author):
+    """Drop an unfollowed author's posts from the user's timeline."""
+    remove_authors_from_timeline(user, [author.id])
+
+
+def remove_authors_from_timeline(user, author_ids):
+    TimelineEntry.objects.filter(user=user, author_id__in=author_ids).delete()
+
+
+def get_feed_queryset(user):
+    """
+    Posts by the users that `user` follows, newest first.
+
+    Fanned-out posts come from the user's TimelineEntry rows; posts by
+    followed celebrity authors are read directly from Post. Both paths expose
+    the sort key as `feed_created_at`/`feed_id` for keyset pagination.
+    """
+    celebrity_ids = list(
+        user.following.filter(follower_count__gt=get_follower_threshold()).values_list('id', flat=True)
+    )
+    if not celebrity_ids:
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_created_at=F('timeline_entries__created_at'),
+            feed_id=F('timeline_entries__post_id'),
+        ).order_by('-feed_created_at', '-feed_id')
+    timeline_post_ids = TimelineEntry.objects.filter(user=user).values('post_id')
+    return Post.objects.filter(
+        Q(pk__in=timeline_post_ids) | Q(author__in=celebrity_ids)
+    ).annotate(
+        feed_created_at=F('created_at'),
+        feed_id=F('id'),
+    ).order_by('-feed_created_at', '-feed_id')
@@ -0,0 +1,159 @@
+"""
+Write-coalescing buffer for post likes.
+
+When POSTS_LIKE_BUFFER['ENABLED'] is set, LikePostView queues likes here
+instead of writing them in the request. Pending likes are deduplicated per
+(user, post) and flushed in one batch when MAX_PENDING is reached or
+FLUSH_INTERVAL seconds after the first queued like, whichever comes first.
+
+The buffer lives in the worker process, so pending likes are only visible to
+requests served by that process until the next flush. Several workers may
+queue the same like, so a flush recounts like_count from the Like table for
+the posts it touched instead of adding the number of likes it queued. If the
+write fails, the pending likes are put back and retried on the next flush.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+
+from notifications.pipeline import NotificationEvent, notify_many
+
+from .counters import recount_likes
+from .models import Like, Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'MAX_PENDING': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'POSTS_LIKE_BUFFER', {})}
+
+
+class LikeBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._per_post = Counter()
+        self._timer = None
+
+    @property
+    def enabled(self):
+        return get_config()['ENABLED']
+
+    def add(self, user_id, post_id):
+        """Queue a like. Returns False if the same like is already pending."""
+        config = get_config()
+        with self._lock:
+            key = (user_id, post_id)
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            self._per_post[post_id] += 1
+            full = len(self._pending) >= config['MAX_PENDING']
+            if not full:
+                self._schedule(config)
+        if full:
+            self.flush()
+        return True
+
+    def discard(self, user_id, post_id):
+        """Drop a pending like. Returns True if it had not been flushed yet."""
+        with self._lock:
+            key = (user_id, post_id)
+            if key not in self._pending:
+                return False
+            self._pending.remove(key)
+            self._per_post[post_id] -= 1
+            if not self._per_post[post_id]:
+                del self._per_post[post_id]
+            return True
+
+    def is_pending(self, user_id, post_id):
+        return (user_id, post_id) in self._pending
+
+    def pending_count(self, post_id):
+        return self._per_post.get(post_id, 0)
+
+    def _schedule(self, config):
+        # Called with self._lock held
+        if self._timer is None and config['FLUSH_INTERVAL']:
+            self._timer = threading.Timer(config['FLUSH_INTERVAL'], self._flush_safely)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _take(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            self._per_post = Counter()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return pending
+
+    def _restore(self, pending):
+        """Put back likes taken by a flush that failed to write them."""
+        with self._lock:
+            for key in pending - self._pending:
+                self._pending.add(key)
+                self._per_post[key[1]] += 1
+            self._schedule(get_config())
+
+    def _flush_safely(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to flush buffered likes')
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        """Write all pending likes and their counter updates, and queue notifications."""
+        pending = self._take()
+        if not pending:
+            return 0
+        try:
+            new_likes, authors = self._write(pending)
+        except Exception:
+            self._restore(pending)
+            raise
+        content_type_id = ContentType.objects.get_for_model(Post).id
+        notify_many([
+            NotificationEvent(authors[post_id], user_id, 'liked your post', content_type_id, post_id)
+            for user_id, post_id in new_likes
+        ])
+        return len(new_likes)
+
+    def _write(self, pending):
+        post_ids = {post_id for _, post_id in pending}
+        user_ids = {user_id for user_id, _ in pending}
+        authors = dict(Post.objects.filter(pk__in=post_ids).values_list('id', 'author_id'))
+        with transaction.atomic():
+            existing = set(
+                Like.objects.filter(post_id__in=post_ids, user_id__in=user_ids).values_list('user_id', 'post_id')
+            )
+            new_likes = [
+                (user_id, post_id) for user_id, post_id in pending
+                if (user_id, post_id) not in existing and post_id in authors
+            ]
+            # Another worker may insert the same likes before this commits,
+            # and ignore_conflicts drops those silently, so count the rows.
+            Like.objects.bulk_create(
+                [Like(user_id=user_id, post_id=post_id) for user_id, post_id in new_likes],
+                ignore_conflicts=True,
+            )
+            recount_likes({post_id for _, post_id in new_likes})
+        return new_likes, authors
+
+
+like_buffer = LikeBuffer()
+atexit.register(like_buffer._flush_safely)
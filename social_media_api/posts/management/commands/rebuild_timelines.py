@@ -0,0 +1,27 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import Follow
+from posts.feed import backfill_timelines
+from posts.models import TimelineEntry
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized feed timelines from the current follow graph.'
+
+    def handle(self, *args, **options):
+        # Rebuild one user at a time, each in its own transaction, so every
+        # feed stays complete while the command runs
+        follows = Follow.objects.select_related('follower', 'followee').order_by('follower_id')
+        total = 0
+        for _, user_follows in groupby(follows.iterator(chunk_size=500), key=lambda follow: follow.follower_id):
+            user_follows = list(user_follows)
+            user = user_follows[0].follower
+            with transaction.atomic():
+                TimelineEntry.objects.filter(user=user).delete()
+                total += backfill_timelines(user, [follow.followee for follow in user_follows])
+        # Users who no longer follow anyone
+        TimelineEntry.objects.exclude(user_id__in=Follow.objects.values('follower_id')).delete()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {total} timeline entries.'))
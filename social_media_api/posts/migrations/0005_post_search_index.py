@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'posts_post_fts'
+PG_INDEX = 'post_search_vector_idx'
+
+
+def _pg_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return GinIndex(SearchVector('title', 'content', config='english'), name=PG_INDEX)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, content, tokenize='unicode61')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5: posts.search falls back to icontains
+            return
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM posts_post'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('posts', 'Post'), _pg_index())
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('posts', 'Post'), _pg_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
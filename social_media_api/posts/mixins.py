@@ -0,0 +1,62 @@
+import hashlib
+
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def optimize_queryset(queryset, serializer_class):
+    """
+    Apply the `select_related` / `prefetch_related` lists declared on a
+    serializer's Meta, so related fields it renders (StringRelatedField
+    authors, actors, ...) are loaded with the page instead of once per row.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    select_related = getattr(meta, 'select_related', ())
+    prefetch_related = getattr(meta, 'prefetch_related', ())
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+class SerializerRelationsMixin:
+    """Generic view mixin applying the serializer's declared relation needs."""
+
+    def filter_queryset(self, queryset):
+        return optimize_queryset(super().filter_queryset(queryset), self.get_serializer_class())
+
+
+class ConditionalRetrieveMixin:
+    """
+    Conditional GET support for RetrieveAPIView, answering with 304 before
+    loading or serializing the object when the request's validators match.
+
+    Views implement `get_validators(lookup)`, returning (etag_parts,
+    last_modified) from the values the representation depends on, or None
+    if the object does not exist. last_modified may be None when the
+    timestamps alone cannot tell every change apart. Object permissions are
+    not checked for a 304, so only use this where reads need none.
+    """
+
+    def get_validators(self, lookup):
+        raise NotImplementedError
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        validators = self.get_validators({self.lookup_field: kwargs[lookup_url_kwarg]})
+        if validators is None:
+            raise Http404
+        etag_parts, last_modified = validators
+        digest = hashlib.md5('|'.join(map(str, etag_parts)).encode(), usedforsecurity=False).hexdigest()
+        etag = quote_etag(digest)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
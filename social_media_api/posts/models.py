@@ -7,6 +7,16 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized engagement counters, kept in sync with F() updates by the
+    # like and comment views and repaired by `manage.py reconcile_post_counters`.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', '-created_at'], name='post_author_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='post_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -19,6 +29,12 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', '-created_at'], name='comment_post_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='comment_created_idx'),
+        ]
+
     def __str__(self):
         return f'Comment by {self.author.username} on {self.post.title}'
 
@@ -34,3 +50,20 @@ class Like(models.Model):
 
     def __str__(self):
         return f'{self.user.username} likes {self.post.title}'
+
+
+# Materialized per-user feed, filled on write by posts.feed.fan_out_post
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} in timeline of {self.user_id}'
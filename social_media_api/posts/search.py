@@ -0,0 +1,142 @@
+"""
+Pluggable full-text search for posts.
+
+PostViewSet's `?search=` is answered by a search backend instead of
+`LIKE '%term%'` scans over title and content:
+
+- SQLiteFTSBackend keeps an FTS5 virtual table (posts_post_fts) whose rowid is
+  the post id. posts.signals updates it when posts are saved or deleted.
+- PostgresSearchBackend matches against a GIN expression index on the
+  title/content tsvector. PostgreSQL maintains that index itself.
+- IcontainsSearchBackend is the old behaviour, for other databases or when
+  FTS5 is unavailable.
+
+Set POSTS_SEARCH_BACKEND to a dotted path to override the choice made from
+the database vendor.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+FTS_TABLE = 'posts_post_fts'
+SEARCH_CONFIG = 'english'
+
+_backend = None
+
+
+def _terms(query):
+    return re.findall(r'\w+', query)
+
+
+class IcontainsSearchBackend:
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, queryset, query):
+        condition = Q()
+        for term in _terms(query):
+            condition &= Q(title__icontains=term) | Q(content__icontains=term)
+        return queryset.filter(condition)
+
+
+class SQLiteFTSBackend:
+    def create_table(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, content, tokenize='unicode61')"
+        )
+
+    def is_available(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            return cursor.fetchone() is not None
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+                [post.pk, post.title, post.content],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            self.create_table(cursor)
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM posts_post')
+
+    def match_expression(self, query):
+        # Quote every term so user input can never be parsed as FTS5 syntax,
+        # and match it as a prefix so partial words still find posts
+        return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in _terms(query))
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        # bm25() is lower for better matches, so negate it for a "higher is better" rank
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+            [match], output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank).order_by('-search_rank', '-created_at')
+
+
+class PostgresSearchBackend(IcontainsSearchBackend):
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        # Must match the GIN expression index created by the posts migrations
+        vector = SearchVector('title', 'content', config=SEARCH_CONFIG)
+        terms = _terms(query)
+        if not terms:
+            return queryset.none()
+        # Prefix match every term, like the SQLite backend
+        search_query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms), config=SEARCH_CONFIG, search_type='raw',
+        )
+        return queryset.annotate(
+            search_document=vector, search_rank=SearchRank(vector, search_query),
+        ).filter(search_document=search_query).order_by('-search_rank', '-created_at')
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'POSTS_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        elif connection.vendor == 'sqlite' and SQLiteFTSBackend().is_available():
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = IcontainsSearchBackend()
+    return _backend
+
+
+class PostSearchFilter(BaseFilterBackend):
+    """Drop-in replacement for SearchFilter that delegates to the search backend."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return get_search_backend().search(queryset, query)
@@ -1,13 +1,21 @@
 from rest_framework import serializers
 from .models import Post, Comment
+from .like_buffer import like_buffer
 
 class PostSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at']
+        fields = ['id', 'author', 'title', 'content', 'like_count', 'comment_count', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'author', 'like_count', 'comment_count', 'created_at', 'updated_at']
+        select_related = ['author']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Include likes still waiting in this process's like buffer
+        data['like_count'] += like_buffer.pending_count(instance.id)
+        return data
 
 class CommentSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
@@ -17,3 +25,4 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
         read_only_fields = ['id', 'author', 'created_at', 'updated_at']
+        select_related = ['author']
@@ -0,0 +1,108 @@
+"""
+Query-count regression tests for list endpoints.
+
+Each paginated endpoint is fetched with a small and a large page size, and
+unpaginated ones before and after more rows are added. Both requests must
+issue the same number of queries, which fails as soon as a serializer starts
+loading a relation once per row.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.models import Follow
+from notifications.pipeline import notify
+from social_media_api.middleware import QueryBudgetExceeded
+
+from .feed import backfill_timeline
+from .models import Comment, Post
+
+User = get_user_model()
+
+ROWS = 12
+
+
+class QueryCountTestMixin:
+    def count_queries(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        return len(queries), len(results)
+
+    def assertConstantQueriesPerPage(self, url, params=None):
+        params = params or {}
+        small, small_rows = self.count_queries(url, {**params, 'page_size': 2})
+        large, large_rows = self.count_queries(url, {**params, 'page_size': ROWS})
+        self.assertEqual((small_rows, large_rows), (2, ROWS))
+        self.assertEqual(small, large, f'{url} issued {large} queries for {ROWS} rows but {small} for 2')
+
+    def assertConstantQueriesAsRowsGrow(self, url, add_rows):
+        before, before_rows = self.count_queries(url, {})
+        add_rows()
+        after, after_rows = self.count_queries(url, {})
+        self.assertGreater(after_rows, before_rows)
+        self.assertEqual(before, after, f'{url} issued {after} queries for {after_rows} rows but {before} for {before_rows}')
+
+
+@override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': False})
+class ListQueryCountTests(QueryCountTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username='reader')
+        authors = [User.objects.create(username=f'author{i}') for i in range(ROWS)]
+        for author in authors:
+            post = Post.objects.create(author=author, title=f'by {author.username}', content='body')
+            Comment.objects.create(post=post, author=author, content='first')
+            Follow.objects.create(follower=cls.reader, followee=author)
+            backfill_timeline(cls.reader, author)
+            # A distinct target per row; notifications on the same target are merged
+            notify(cls.reader, author, 'mentioned you', target=post)
+
+    def setUp(self):
+        self.client.force_authenticate(self.reader)
+
+    def test_post_list(self):
+        self.assertConstantQueriesPerPage(reverse('post-list'))
+
+    def test_post_list_cursor_mode(self):
+        self.assertConstantQueriesPerPage(reverse('post-list'), {'pagination': 'cursor'})
+
+    def test_comment_list(self):
+        self.assertConstantQueriesPerPage(reverse('comment-list'))
+
+    def test_feed(self):
+        self.assertConstantQueriesPerPage(reverse('feed'))
+
+    def test_notification_list(self):
+        def add_notifications():
+            for i in range(ROWS):
+                author = User.objects.create(username=f'extra{i}')
+                post = Post.objects.create(author=author, title=f'by extra{i}', content='body')
+                notify(self.reader, author, 'mentioned you', target=post)
+
+        self.assertConstantQueriesAsRowsGrow(reverse('notifications-list'), add_notifications)
+
+
+class QueryBudgetMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create(username='budgeted'))
+
+    def test_reports_query_headers(self):
+        response = self.client.get(reverse('post-list'))
+        self.assertEqual(response['X-DB-Query-Count'], '1')
+        self.assertIn('X-DB-Query-Time-Ms', response)
+
+    @override_settings(QUERY_BUDGETS={'post-list': 0})
+    def test_raises_under_tests_when_over_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('post-list'))
+
+    @override_settings(QUERY_BUDGETS={'post-list': 0}, QUERY_BUDGET_RAISE=False)
+    def test_flags_response_when_not_raising(self):
+        with self.assertLogs('social_media_api.middleware', 'WARNING'):
+            response = self.client.get(reverse('post-list'))
+        self.assertEqual(response['X-Query-Budget-Exceeded'], '1 queries > 0')
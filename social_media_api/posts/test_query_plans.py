@@ -0,0 +1,113 @@
+"""
+Query-plan regression tests for the hot social_media_api queries.
+
+Each test calls an endpoint, captures the SQL it actually runs against the
+table under test, and runs EXPLAIN QUERY PLAN on SQLite over each of those
+statements. It fails if the planner falls back to a full table scan or
+sorts through a temporary B-tree, which means a composite index from
+Meta.indexes is no longer being used by the view.
+"""
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.models import Follow
+from notifications.pipeline import notify
+
+from .feed import backfill_timeline
+from .models import Comment, Post
+
+User = get_user_model()
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+@override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': False})
+class QueryPlanTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='planner')
+        cls.authors = [User.objects.create(username=f'author{i}') for i in range(3)]
+        for author in cls.authors:
+            for i in range(4):
+                post = Post.objects.create(author=author, title=f'plan {i}', content='body')
+                Comment.objects.create(post=post, author=author, content='first')
+                notify(cls.user, author, 'mentioned you', target=post)
+            Follow.objects.create(follower=cls.user, followee=author)
+            backfill_timeline(cls.user, author)
+        cls.post = Post.objects.first()
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def endpoint_queries(self, table, method, url, data=None):
+        """SQL statements on `table` run by the request, checked to exist."""
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format='json' if method != 'get' else None)
+        self.assertLess(response.status_code, 400)
+        statements = [
+            query['sql'] for query in context.captured_queries
+            if f'FROM "{table}"' in query['sql'] or query['sql'].startswith(f'UPDATE "{table}"')
+        ]
+        self.assertTrue(statements, f'{url} ran no query on {table}')
+        return response, statements
+
+    def assertUsesIndexes(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+        for line in plan.splitlines():
+            words = line.split()
+            if 'TEMP' in words and 'B-TREE' in words:
+                self.fail(f'Temporary sort in query plan:\n{sql}\n{plan}')
+            if 'SCAN' in words and 'USING' not in words:
+                self.fail(f'Full table scan in query plan:\n{sql}\n{plan}')
+
+    def assertEndpointUsesIndexes(self, table, method, url, data=None):
+        response, statements = self.endpoint_queries(table, method, url, data)
+        for sql in statements:
+            self.assertUsesIndexes(sql)
+        return response
+
+    def test_feed(self):
+        self.assertEndpointUsesIndexes('posts_post', 'get', reverse('feed'))
+
+    def test_feed_cursor_page(self):
+        response = self.assertEndpointUsesIndexes(
+            'posts_post', 'get', reverse('feed'), {'pagination': 'cursor', 'page_size': 2}
+        )
+        self.assertEndpointUsesIndexes('posts_post', 'get', response.data['next'])
+
+    @override_settings(FEED_FANOUT_FOLLOWER_THRESHOLD=0)
+    def test_feed_with_celebrity_authors(self):
+        self.assertEndpointUsesIndexes('posts_post', 'get', reverse('feed'), {'pagination': 'cursor'})
+
+    def test_follow_backfills_posts_by_author(self):
+        reader = User.objects.create(username='reader')
+        self.client.force_authenticate(reader)
+        self.assertEndpointUsesIndexes('posts_post', 'post', reverse('follow-user', args=[self.authors[0].id]))
+
+    def test_post_list(self):
+        self.assertEndpointUsesIndexes('posts_post', 'get', reverse('post-list'))
+
+    def test_post_list_cursor_page(self):
+        response = self.assertEndpointUsesIndexes(
+            'posts_post', 'get', reverse('post-list'), {'pagination': 'cursor', 'page_size': 2}
+        )
+        self.assertEndpointUsesIndexes('posts_post', 'get', response.data['next'])
+
+    def test_comment_list(self):
+        self.assertEndpointUsesIndexes('posts_comment', 'get', reverse('comment-list'))
+
+    def test_comments_for_post(self):
+        self.assertEndpointUsesIndexes('posts_comment', 'get', reverse('comment-list'), {'post': self.post.id})
+
+    def test_notification_list(self):
+        self.assertEndpointUsesIndexes('notifications_notification', 'get', reverse('notifications-list'))
+
+    def test_mark_unread_notifications_read(self):
+        self.assertEndpointUsesIndexes('notifications_notification', 'post', reverse('notifications-mark-read'))
@@ -0,0 +1,383 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from social_media_api.metrics import get_config as get_metrics_config, registry
+
+from .like_buffer import like_buffer
+from .models import Comment, Like, Post, TimelineEntry
+from .pagination import KeysetPagination
+from .search import SQLiteFTSBackend, get_search_backend
+
+User = get_user_model()
+
+
+class FeedTimelineTests(APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='pass')
+        self.author = User.objects.create_user(username='author', password='pass')
+        self.stranger = User.objects.create_user(username='stranger', password='pass')
+        self.client.force_authenticate(self.reader)
+        self.client.post(reverse('follow-user', args=[self.author.id]))
+        self.author.refresh_from_db()
+
+    def create_post(self, user, title):
+        self.client.force_authenticate(user)
+        response = self.client.post(reverse('post-list'), {'title': title, 'content': 'body'})
+        self.client.force_authenticate(self.reader)
+        return Post.objects.get(pk=response.data['id'])
+
+    def feed_titles(self):
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(response.status_code, 200)
+        return [post['title'] for post in response.data['results']]
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        post = self.create_post(self.author, 'hello')
+        self.create_post(self.stranger, 'unrelated')
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertEqual(self.feed_titles(), ['hello'])
+
+    def test_feed_keeps_paginated_response_shape(self):
+        self.create_post(self.author, 'first')
+        self.create_post(self.author, 'second')
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(set(response.data), {'count', 'next', 'previous', 'results'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([p['title'] for p in response.data['results']], ['second', 'first'])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        self.create_post(self.stranger, 'older')
+        self.client.post(reverse('follow-user', args=[self.stranger.id]))
+        self.assertEqual(self.feed_titles(), ['older'])
+        self.client.post(reverse('unfollow-user', args=[self.stranger.id]))
+        self.assertEqual(self.feed_titles(), [])
+
+    def test_rebuild_timelines(self):
+        kept = self.create_post(self.author, 'kept')
+        stray = self.create_post(self.stranger, 'stray')
+        TimelineEntry.objects.filter(post=kept).delete()
+        TimelineEntry.objects.create(user=self.reader, post=stray, author=self.stranger, created_at=stray.created_at)
+        TimelineEntry.objects.create(user=self.stranger, post=kept, author=self.author, created_at=kept.created_at)
+        out = StringIO()
+        call_command('rebuild_timelines', stdout=out)
+        self.assertIn('Wrote 1 timeline entries.', out.getvalue())
+        self.assertEqual(self.feed_titles(), ['kept'])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.stranger).exists())
+
+    @override_settings(FEED_FANOUT_FOLLOWER_THRESHOLD=0)
+    def test_celebrity_posts_are_merged_on_read(self):
+        post = self.create_post(self.author, 'famous')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed_titles(), ['famous'])
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='pass')
+        self.client.force_authenticate(self.user)
+        for i in range(5):
+            Post.objects.create(author=self.user, title=f'post {i}', content='body')
+
+    def collect(self, url, params):
+        titles, previous = [], None
+        response = self.client.get(url, params)
+        while True:
+            self.assertNotIn('count', response.data)
+            titles.extend(post['title'] for post in response.data['results'])
+            previous = response.data['previous']
+            if not response.data['next']:
+                return titles, previous
+            response = self.client.get(response.data['next'])
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(reverse('post-list'), {'page_size': 2})
+        self.assertEqual(response.data['count'], 5)
+
+    def test_cursor_mode_walks_every_post_once(self):
+        titles, previous = self.collect(reverse('post-list'), {'pagination': 'cursor', 'page_size': 2})
+        self.assertEqual(titles, [f'post {i}' for i in reversed(range(5))])
+        response = self.client.get(previous)
+        self.assertEqual([p['title'] for p in response.data['results']], ['post 2', 'post 1'])
+
+    def test_cursor_is_stable_under_inserts(self):
+        response = self.client.get(reverse('post-list'), {'pagination': 'cursor', 'page_size': 2})
+        Post.objects.create(author=self.user, title='newer', content='body')
+        response = self.client.get(response.data['next'])
+        self.assertEqual([p['title'] for p in response.data['results']], ['post 2', 'post 1'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('post-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursors_are_rejected(self):
+        keyset = KeysetPagination()
+        for position in (['abc', 1], [{'a': 1}, 1], ['2024-01-01T00:00:00', 'zz'], [None, 1]):
+            cursor = keyset.encode_cursor(position, reverse=False)
+            for url in (reverse('post-list'), reverse('feed')):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404, (url, position))
+
+    def test_feed_supports_cursor_mode(self):
+        reader = User.objects.create_user(username='follower', password='pass')
+        self.client.force_authenticate(reader)
+        self.client.post(reverse('follow-user', args=[self.user.id]))
+        titles, _ = self.collect(reverse('feed'), {'pagination': 'cursor', 'page_size': 2})
+        self.assertEqual(titles, [f'post {i}' for i in reversed(range(5))])
+
+
+@override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': False})
+class EngagementCounterTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='poster', password='pass')
+        self.fan = User.objects.create_user(username='fan', password='pass')
+        self.post = Post.objects.create(author=self.author, title='counted', content='body')
+        self.client.force_authenticate(self.fan)
+
+    def test_like_and_unlike_update_like_count(self):
+        self.client.post(reverse('like-post', args=[self.post.id]))
+        self.client.post(reverse('like-post', args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.client.post(reverse('unlike-post', args=[self.post.id]))
+        response = self.client.post(reverse('unlike-post', args=[self.post.id]))
+        self.assertEqual(response.status_code, 400)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_comment_create_and_delete_update_comment_count(self):
+        response = self.client.post(reverse('comment-list'), {'post': self.post.id, 'content': 'nice'})
+        self.assertEqual(self.client.get(reverse('post-detail', args=[self.post.id])).data['comment_count'], 1)
+        self.client.delete(reverse('comment-detail', args=[response.data['id']]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_reconcile_command_repairs_drift(self):
+        Like.objects.create(post=self.post, user=self.fan)
+        Comment.objects.create(post=self.post, author=self.fan, content='direct')
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        call_command('reconcile_post_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+
+
+@override_settings(
+    POSTS_LIKE_BUFFER={'ENABLED': True, 'MAX_PENDING': 3, 'FLUSH_INTERVAL': None},
+    NOTIFICATIONS_PIPELINE={'ASYNC': False},
+)
+class LikeBufferTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='viral', password='pass')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='pass') for i in range(3)]
+        self.post = Post.objects.create(author=self.author, title='hot', content='body')
+        self.addCleanup(like_buffer.flush)
+
+    def like(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('like-post', args=[self.post.id]))
+
+    def test_pending_like_is_visible_and_deduplicated(self):
+        self.assertEqual(self.like(self.fans[0]).status_code, 200)
+        self.assertEqual(self.like(self.fans[0]).status_code, 400)
+        self.assertFalse(Like.objects.exists())
+        response = self.client.get(reverse('post-detail', args=[self.post.id]))
+        self.assertEqual(response.data['like_count'], 1)
+
+    def test_unlike_drops_pending_like(self):
+        self.like(self.fans[0])
+        response = self.client.post(reverse('unlike-post', args=[self.post.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(like_buffer.flush(), 0)
+
+    def test_size_threshold_flushes_in_one_batch(self):
+        for fan in self.fans:
+            self.like(fan)
+        self.post.refresh_from_db()
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 3)
+        self.assertEqual(self.post.like_count, 3)
+        notification = self.author.notifications.get()
+        self.assertEqual(notification.actor_count, 3)
+
+    def test_like_flushed_by_another_worker_is_counted_once(self):
+        self.like(self.fans[0])
+        bulk_create = Like.objects.bulk_create
+
+        def other_worker_first(likes, **kwargs):
+            Like.objects.create(user=self.fans[0], post=self.post)
+            Post.objects.filter(pk=self.post.pk).update(like_count=1)
+            return bulk_create(likes, **kwargs)
+
+        with mock.patch.object(Like.objects, 'bulk_create', side_effect=other_worker_first):
+            like_buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+    def test_failed_flush_keeps_pending_likes(self):
+        self.like(self.fans[0])
+        with mock.patch('posts.like_buffer.recount_likes', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                like_buffer.flush()
+        self.assertTrue(like_buffer.is_pending(self.fans[0].id, self.post.id))
+        self.assertEqual(like_buffer.flush(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+
+class PostSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='searcher', password='pass')
+        self.client.force_authenticate(self.user)
+        self.django = Post.objects.create(author=self.user, title='Django tips', content='Query optimisation')
+        self.python = Post.objects.create(author=self.user, title='Python', content='Django Django Django')
+        Post.objects.create(author=self.user, title='Cooking', content='Bread recipes')
+
+    def search(self, query):
+        response = self.client.get(reverse('post-list'), {'search': query})
+        return [post['title'] for post in response.data['results']]
+
+    def test_search_uses_full_text_backend(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTSBackend)
+
+    def test_matches_are_ranked(self):
+        self.assertEqual(self.search('django'), ['Python', 'Django tips'])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('django optimisation'), ['Django tips'])
+
+    def test_partial_words_match(self):
+        self.assertEqual(self.search('optim'), ['Django tips'])
+        self.assertEqual(self.search('djan optimis'), ['Django tips'])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.client.patch(reverse('post-detail', args=[self.python.id]), {'content': 'Snakes'})
+        self.assertEqual(self.search('django'), ['Django tips'])
+        self.client.delete(reverse('post-detail', args=[self.django.id]))
+        self.assertEqual(self.search('django'), [])
+
+    def test_fts_syntax_in_query_is_treated_as_text(self):
+        self.assertEqual(self.search('"django* OR'), [])
+
+
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='timed', password='pass')
+        self.client.force_authenticate(self.user)
+        Post.objects.create(author=self.user, title='Timed', content='body')
+
+    def timing_metrics(self, response):
+        return {metric.split(';')[0]: metric for metric in response['Server-Timing'].split(', ')}
+
+    def test_view_phases_are_reported(self):
+        metrics = self.timing_metrics(self.client.get(reverse('post-list')))
+        self.assertEqual(
+            set(metrics), {'auth', 'perm', 'filter', 'paginate', 'serialize', 'view', 'render', 'db', 'total'}
+        )
+        self.assertRegex(metrics['db'], r'desc="\d+ queries"')
+
+    def test_feed_phases_are_reported(self):
+        metrics = self.timing_metrics(self.client.get(reverse('feed')))
+        self.assertIn('paginate', metrics)
+        self.assertIn('serialize', metrics)
+
+    def test_detail_view_serializes_without_paginating(self):
+        post = Post.objects.first()
+        metrics = self.timing_metrics(self.client.get(reverse('post-detail', args=[post.id])))
+        self.assertIn('serialize', metrics)
+        self.assertNotIn('paginate', metrics)
+
+    @override_settings(SERVER_TIMING={'ENABLED': False})
+    def test_can_be_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('post-list')))
+
+    def test_logs_a_line_per_request(self):
+        with self.assertLogs('social_media_api.timing', 'INFO') as logs:
+            self.client.get(reverse('feed'))
+        self.assertIn('route=feed status=200', logs.output[0])
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(username='metered', password='pass')
+        self.client.force_authenticate(self.user)
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return response.content.decode()
+
+    def test_requests_latency_and_queries_are_exported(self):
+        self.client.get(reverse('post-list'))
+        self.client.get(reverse('post-list'))
+        body = self.scrape()
+        self.assertIn('http_requests_total{method="GET",route="post-list",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="post-list"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="post-list",le="+Inf"} 2', body)
+        self.assertRegex(body, r'db_queries_total\{route="post-list"\} \d+')
+
+    def test_cache_hit_ratio(self):
+        cache.clear()
+        self.client.get(reverse('notifications-unread-count'))
+        self.client.get(reverse('notifications-unread-count'))
+        body = self.scrape()
+        self.assertIn('cache_requests_total{cache="unread_count",result="hit"} 1', body)
+        self.assertIn('cache_hit_ratio{cache="unread_count"} 0.5000', body)
+
+    def test_snapshots_from_other_workers_are_summed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(METRICS={'DIRECTORY': directory}):
+                self.client.get(reverse('post-list'))
+                # Pretend the snapshot was written by another worker
+                registry.write(directory, get_metrics_config()['BUCKETS'])
+                os.rename(
+                    os.path.join(directory, f'metrics-{os.getpid()}.json'),
+                    os.path.join(directory, 'metrics-1.json'),
+                )
+                body = self.scrape()
+        self.assertIn('http_requests_total{method="GET",route="post-list",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="post-list"} 2', body)
+
+    def test_unwritable_directory_does_not_fail_the_scrape(self):
+        self.client.get(reverse('post-list'))
+        with override_settings(METRICS={'DIRECTORY': os.path.join(tempfile.gettempdir(), 'missing', 'metrics')}):
+            with self.assertLogs('social_media_api.metrics', 'ERROR'):
+                body = self.scrape()
+        self.assertIn('http_requests_total{method="GET",route="post-list",status="200"} 1', body)
+
+    def test_only_allowed_addresses_and_staff_can_scrape(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.9').status_code, 403)
+        staff = User.objects.create_user(username='ops', password='pass', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.9').status_code, 200)
+
+
+@override_settings(NOTIFICATIONS_PIPELINE={'ASYNC': False})
+class ConditionalPostDetailTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='etag', password='pass')
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title='Cached', content='body')
+        self.url = reverse('post-detail', args=[self.post.id])
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_counters(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.post(reverse('like-post', args=[self.post.id]))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['like_count'], 1)
@@ -1,58 +1,78 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions
 from .models import Post, Comment, Like
-from notifications.models import Notification
-from django.contrib.contenttypes.models import ContentType
+from notifications.pipeline import notify
+from social_media_api.timing import ServerTimingMixin
 
 from rest_framework import generics
+from .serializers import PostSerializer, CommentSerializer
+from .counters import adjust_counter
+from .feed import fan_out_post, get_feed_queryset
+from .like_buffer import like_buffer
+from .mixins import ConditionalRetrieveMixin, SerializerRelationsMixin, optimize_queryset
+from .pagination import PostPagination
+from .search import PostSearchFilter
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.db import transaction
 
-class LikePostView(APIView):
+class LikePostView(ServerTimingMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
         post = generics.get_object_or_404(Post, pk=pk)
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        if like_buffer.enabled:
+            return self.buffered_like(request, post)
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                adjust_counter(post.id, 'like_count', 1)
         if not created:
             return Response({'detail': 'You have already liked this post.'}, status=status.HTTP_400_BAD_REQUEST)
-        # Create notification for post author
-        if post.author != request.user:
-            Notification.objects.create(
-                recipient=post.author,
-                actor=request.user,
-                verb='liked your post',
-                target_object_id=post.id,
-                target_content_type=ContentType.objects.get_for_model(Post)
-            )
+        # Queue notification for post author
+        notify(post.author, request.user, 'liked your post', target=post)
         return Response({'detail': 'Post liked.'})
 
-class UnlikePostView(APIView):
+    def buffered_like(self, request, post):
+        already_liked = (
+            like_buffer.is_pending(request.user.id, post.id)
+            or Like.objects.filter(user=request.user, post=post).exists()
+            or not like_buffer.add(request.user.id, post.id)
+        )
+        if already_liked:
+            return Response({'detail': 'You have already liked this post.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'detail': 'Post liked.'})
+
+class UnlikePostView(ServerTimingMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
         post = generics.get_object_or_404(Post, pk=pk)
-        try:
-            like = Like.objects.get(user=request.user, post=post)
-            like.delete()
+        if like_buffer.discard(request.user.id, post.id):
             return Response({'detail': 'Post unliked.'})
-        except Like.DoesNotExist:
+        with transaction.atomic():
+            deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+            if deleted:
+                adjust_counter(post.id, 'like_count', -1)
+        if not deleted:
             return Response({'detail': 'You have not liked this post.'}, status=status.HTTP_400_BAD_REQUEST)
-from .serializers import PostSerializer, CommentSerializer
+        return Response({'detail': 'Post unliked.'})
 
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
-from django.contrib.auth import get_user_model
-class FeedView(APIView):
+class FeedView(ServerTimingMixin, generics.GenericAPIView):
+    serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = PostPagination
+    keyset_ordering = ('-feed_created_at', '-feed_id')
+
+    def get_queryset(self):
+        return optimize_queryset(get_feed_queryset(self.request.user), PostSerializer)
 
     def get(self, request):
-        user = request.user
-        following_users = user.following.all()
-        posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
-        paginator = PostPagination()
-        page = paginator.paginate_queryset(posts, request)
-        serializer = PostSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -60,27 +80,55 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
         return obj.author == request.user
 
-class PostPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ServerTimingMixin, ConditionalRetrieveMixin, SerializerRelationsMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all().order_by('-created_at')
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     pagination_class = PostPagination
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['title', 'content']
+    filter_backends = [PostSearchFilter]
+
+    def get_validators(self, lookup):
+        # Counters are bumped with UPDATE ... F() and leave updated_at alone,
+        # so there is no Last-Modified
+        row = Post.objects.filter(**lookup).values_list(
+            'pk', 'updated_at', 'like_count', 'comment_count', 'author__username',
+        ).first()
+        if row is None:
+            return None
+        return (*row, like_buffer.pending_count(row[0])), None
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        fan_out_post(post)
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ServerTimingMixin, SerializerRelationsMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all().order_by('-created_at')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     pagination_class = PostPagination
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        post_id = self.request.query_params.get('post')
+        if post_id and post_id.isdigit():
+            queryset = queryset.filter(post_id=post_id)
+        return queryset
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        adjust_counter(comment.post_id, 'comment_count', 1)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_post_id = serializer.instance.post_id
+        comment = serializer.save()
+        if comment.post_id != old_post_id:
+            adjust_counter(old_post_id, 'comment_count', -1)
+            adjust_counter(comment.post_id, 'comment_count', 1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        instance.delete()
+        adjust_counter(post_id, 'comment_count', -1)
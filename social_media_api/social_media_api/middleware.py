@@ -0,0 +1,101 @@
+"""
+Per-request SQL query budgets.
+
+QueryBudgetMiddleware counts the queries a request issues and the time spent
+in them, on every configured database. It compares the totals with the budget
+for the request's URL name and reports them on the response as
+X-DB-Query-Count / X-DB-Query-Time-Ms headers.
+
+When a budget is exceeded the middleware adds an X-Query-Budget-Exceeded
+header and logs a warning. If the query count is over budget and
+QUERY_BUDGET_RAISE is True, it raises QueryBudgetExceeded instead; the
+project's test runner (social_media_api.test_runner) turns it on, so N+1
+regressions fail the test suite. Time budgets only warn,
+since timings are too noisy to fail tests on.
+
+Settings:
+
+    QUERY_BUDGETS = {
+        'feed': 6,                                # max queries
+        'post-list': {'queries': 6, 'time_ms': 50},
+    }
+    QUERY_BUDGET_DEFAULT = None                   # budget for unlisted routes
+    QUERY_BUDGET_RAISE = False                    # raise instead of warning
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def get_budget(url_name):
+    budget = getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+    if budget is None:
+        budget = getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+    if budget is None:
+        return None
+    if isinstance(budget, int):
+        return {'queries': budget}
+    return budget
+
+
+def should_raise():
+    return bool(getattr(settings, 'QUERY_BUDGET_RAISE', False))
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+
+        duration_ms = stats.duration * 1000
+        response['X-DB-Query-Count'] = str(stats.count)
+        response['X-DB-Query-Time-Ms'] = f'{duration_ms:.1f}'
+
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        budget = get_budget(url_name)
+        if budget is None:
+            return response
+
+        problems = []
+        over_count = budget.get('queries') is not None and stats.count > budget['queries']
+        if over_count:
+            problems.append(f"{stats.count} queries > {budget['queries']}")
+        if budget.get('time_ms') is not None and duration_ms > budget['time_ms']:
+            problems.append(f"{duration_ms:.1f}ms > {budget['time_ms']}ms")
+        if problems:
+            message = f"Query budget exceeded for {url_name} ({request.method} {request.path}): {', '.join(problems)}"
+            if over_count and should_raise():
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+            response['X-Query-Budget-Exceeded'] = '; '.join(problems)
+        return response
@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'social_media_api.metrics.MetricsMiddleware',
+    'social_media_api.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'social_media_api.timing.ServerTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'social_media_api.urls'
@@ -133,6 +136,73 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 # DRF authentication settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
 }
+
+# Token lookup cache used by CachedTokenAuthentication. The cache is per
+# worker process: a deleted or rotated token, or a deactivated user, still
+# authenticates on other workers for up to TTL seconds.
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 5,
+}
+
+# Feed fan-out: posts by authors with more followers than this are not copied
+# into follower timelines and are merged into the feed at read time instead.
+FEED_FANOUT_FOLLOWER_THRESHOLD = 1000
+
+# Write-coalescing like buffer (posts.like_buffer). When enabled, likes are
+# queued in-process and written in batches instead of once per request.
+POSTS_LIKE_BUFFER = {
+    'ENABLED': False,
+    'MAX_PENDING': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+# Notification pipeline (notifications.pipeline). Events are aggregated and
+# written in batches off the request path when ASYNC is True.
+NOTIFICATIONS_PIPELINE = {
+    'ASYNC': True,
+    'MAX_PENDING': 1000,
+    'FLUSH_INTERVAL': 2.0,
+}
+
+# Seconds an unread notification count is cached (notifications.counters).
+# The default cache is per process, so other workers can serve a stale count
+# for this long; raise it only with a CACHES backend shared by all workers.
+NOTIFICATIONS_UNREAD_COUNT_TIMEOUT = 5
+
+# Per-URL-name SQL query budgets enforced by QueryBudgetMiddleware
+QUERY_BUDGETS = {
+    'post-list': 8,
+    'post-detail': 8,
+    'comment-list': 8,
+    'feed': 6,
+    'like-post': 16,
+    'follow-user': 10,
+    'bulk-follow': 12,
+    'notifications-list': 4,
+    'notifications-unread-count': 3,
+    'profile': 3,
+}
+QUERY_BUDGET_DEFAULT = None
+# Raise QueryBudgetExceeded instead of warning; the test runner sets it to True
+QUERY_BUDGET_RAISE = False
+TEST_RUNNER = 'social_media_api.test_runner.QueryBudgetTestRunner'
+
+# Server-Timing header and per-request timing log lines (social_media_api.timing)
+SERVER_TIMING = {
+    'ENABLED': True,
+    'HEADER': True,
+    'LOG': True,
+}
+
+# Prometheus-style metrics served at /metrics/ (social_media_api.metrics).
+# Point DIRECTORY (or $PROMETHEUS_MULTIPROC_DIR) at a directory shared by all
+# workers so every scrape reports the totals of the whole server.
+METRICS = {
+    'ENABLED': True,
+    'DIRECTORY': None,
+    'WRITE_INTERVAL': 1.0,
+}
@@ -0,0 +1,199 @@
+"""
+Server-Timing instrumentation for DRF views.
+
+ServerTimingMiddleware attaches a RequestTimings to every request and times
+the SQL it runs. Views using ServerTimingMixin also record their phases:
+
+    auth       authenticating the request
+    perm       permission checks
+    db         executing SQL, wherever it happens (queryset evaluation)
+    filter     filter_queryset(): filter backends such as DjangoFilterBackend
+    paginate   paginate_queryset(), apart from the SQL it runs
+    serialize  building serializer.data
+    view       the rest of the handler
+    render     rendering the response
+    total      the whole request, as seen by the middleware
+
+Each phase excludes the SQL run inside it, which is counted under `db`
+instead, so the phases add up to roughly `total`. The result is sent as a
+Server-Timing header and logged as one key=value line per request.
+
+Settings:
+
+    SERVER_TIMING = {
+        'ENABLED': True,
+        'HEADER': True,   # set the Server-Timing response header
+        'LOG': True,      # log a line per request on this module's logger
+    }
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'HEADER': True,
+    'LOG': True,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'SERVER_TIMING', {})}
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.db = 0.0
+        self.queries = 0
+        self._render_start = None
+        # Time claimed by nested phases and SQL, per open phase
+        self._stack = []
+
+    def _claim(self, seconds):
+        if self._stack:
+            self._stack[-1] += seconds
+
+    @contextmanager
+    def phase(self, name):
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+            self._claim(elapsed)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db += elapsed
+            self.queries += 1
+            self._claim(elapsed)
+
+    def start_render(self):
+        self._render_start = time.perf_counter()
+
+    def finish(self):
+        end = time.perf_counter()
+        if self._render_start is not None:
+            self.phases['render'] = end - self._render_start
+        self.phases['db'] = self.db
+        self.phases['total'] = end - self.start
+
+    def header(self):
+        metrics = []
+        for name, seconds in self.phases.items():
+            metric = f'{name};dur={seconds * 1000:.1f}'
+            if name == 'db':
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        return ', '.join(metrics)
+
+
+def timed(request, name):
+    """Context manager timing `name` on the request, a no-op when timing is off."""
+    timings = getattr(request, 'server_timings', None)
+    return timings.phase(name) if timings is not None else nullcontext()
+
+
+@lru_cache(maxsize=None)
+def _timed_serializer_class(serializer_class):
+    """Subclass of `serializer_class` whose `data` is timed as `serialize`."""
+
+    class TimedSerializer(serializer_class):
+        @property
+        def data(self):
+            with timed(self.context.get('request'), 'serialize'):
+                return super().data
+
+    TimedSerializer.__name__ = TimedSerializer.__qualname__ = serializer_class.__name__
+    return TimedSerializer
+
+
+class ServerTimingMixin:
+    """APIView mixin recording auth, permission, filter, pagination and serialization phases."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with timed(request, 'view'):
+            return super().dispatch(request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        with timed(request, 'auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with timed(request, 'perm'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed(request, 'perm'):
+            super().check_object_permissions(request, obj)
+
+    def filter_queryset(self, queryset):
+        with timed(self.request, 'filter'):
+            return super().filter_queryset(queryset)
+
+    def paginate_queryset(self, queryset):
+        with timed(self.request, 'paginate'):
+            return super().paginate_queryset(queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        # many=True returns a ListSerializer, so swap the class of whatever
+        # instance was built rather than the view's serializer_class
+        serializer.__class__ = _timed_serializer_class(type(serializer))
+        return serializer
+
+
+class ServerTimingMiddleware:
+    """
+    Keep this last in MIDDLEWARE: responses are rendered right after the
+    innermost middleware hands them back, so `render` ends where it returns.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        timings = request.server_timings = RequestTimings()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings))
+            response = self.get_response(request)
+        timings.finish()
+
+        if config['HEADER']:
+            response['Server-Timing'] = timings.header()
+        if config['LOG'] and logger.isEnabledFor(logging.INFO):
+            match = request.resolver_match
+            fields = ' '.join(f'{name}={seconds * 1000:.1f}' for name, seconds in timings.phases.items())
+            logger.info(
+                'method=%s path=%s route=%s status=%s queries=%d %s',
+                request.method, request.path, match.view_name if match else '-',
+                response.status_code, timings.queries, fields,
+                extra={'server_timing': {name: seconds * 1000 for name, seconds in timings.phases.items()}},
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, 'server_timings', None)
+        if timings is not None:
+            timings.start_render()
+        return response